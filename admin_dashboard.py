@@ -1,11 +1,9 @@
-import sqlite3
+import db
+from user_management import USERS_DATABASE_PATH
 
 def fetch_total_users():
-    conn = sqlite3.connect('users.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT COUNT(*) FROM users')
-    total = cursor.fetchone()[0]
-    conn.close()
+    with db.connection(USERS_DATABASE_PATH) as conn:
+        total = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
     return total
 
 def fetch_free_users():
@@ -1,4 +1,104 @@
-from database import load_api_key
+import threading
+import time
+from database import load_api_key, load_api_keys
+
+# Seconds a key is taken out of rotation after NewsAPI rejects it
+THROTTLED_COOLDOWN = 300
+UNAUTHORIZED_COOLDOWN = 3600
+# Seconds between reloads of the key list from the database
+KEY_REFRESH_INTERVAL = 30
+
+
+class KeyPool:
+    """Spreads requests over several NewsAPI keys.
+
+    Each acquire() picks the available key with the lowest usage relative to
+    its weight, so a key with weight 2 serves twice as many requests as a key
+    with weight 1. Keys that get a 401 or 429 are quarantined for a cooldown.
+    """
+
+    def __init__(self):
+        self._weights = {}
+        self._usage = {}
+        self._quarantined_until = {}
+        self._lock = threading.Lock()
+        self.loaded_at = None
+
+    def set_keys(self, keys):
+        """Replaces the pool with the given (key, weight) pairs, keeping usage counts."""
+        with self._lock:
+            self._weights = {key: max(weight or 1, 1) for key, weight in keys}
+            for key in self._weights:
+                self._usage.setdefault(key, 0)
+            self.loaded_at = time.monotonic()
+
+    def __len__(self):
+        return len(self._weights)
+
+    def acquire(self):
+        """Returns the next key to use, or None if the pool is empty or every key is quarantined."""
+        with self._lock:
+            now = time.monotonic()
+            available = [k for k in self._weights if self._quarantined_until.get(k, 0) <= now]
+            if not available:
+                return None
+            key = min(available, key=lambda k: self._usage[k] / self._weights[k])
+            self._usage[key] += 1
+            return key
+
+    def cooldown(self):
+        """Returns the seconds until the first quarantined key is usable again (0.0 if one is usable now)."""
+        with self._lock:
+            now = time.monotonic()
+            return max(min((self._quarantined_until.get(k, 0) - now for k in self._weights), default=0.0), 0.0)
+
+    def quarantine(self, key, seconds):
+        """Takes a key out of rotation for the given number of seconds."""
+        with self._lock:
+            self._quarantined_until[key] = max(self._quarantined_until.get(key, 0), time.monotonic() + seconds)
+
+    def report(self, key, status_code):
+        """Records the response status for a key, quarantining rejected keys."""
+        if status_code == 401:
+            self.quarantine(key, UNAUTHORIZED_COOLDOWN)
+        elif status_code == 429:
+            self.quarantine(key, THROTTLED_COOLDOWN)
+
+    def stats(self):
+        """Returns per-key usage, weight and remaining cooldown."""
+        with self._lock:
+            now = time.monotonic()
+            return {
+                key: {
+                    "weight": weight,
+                    "requests": self._usage.get(key, 0),
+                    "cooldown": max(self._quarantined_until.get(key, 0) - now, 0.0),
+                }
+                for key, weight in self._weights.items()
+            }
+
+
+key_pool = KeyPool()
+
+
+def reload_keys():
+    """Loads the key list from the database into the pool."""
+    key_pool.set_keys(load_api_keys())
+
+
+def refresh_keys():
+    """Reloads the key list if it was never loaded or is older than KEY_REFRESH_INTERVAL."""
+    if key_pool.loaded_at is None or time.monotonic() - key_pool.loaded_at > KEY_REFRESH_INTERVAL:
+        reload_keys()
+
 
 def get_api_key():
+    """Returns the next key from the pool, falling back to the single saved key.
+
+    Returns None while every pooled key is quarantined; key_pool.cooldown()
+    says for how long.
+    """
+    refresh_keys()
+    if len(key_pool):
+        return key_pool.acquire()
     return load_api_key()
@@ -0,0 +1,94 @@
+import sys
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class Article:
+    """Compact record for a single NewsAPI article.
+
+    Uses __slots__ instead of a per-instance dict, keeps only the fields the
+    app displays or exports, and interns source and author names, which
+    repeat across thousands of articles.
+    """
+
+    __slots__ = ("title", "description", "content", "url", "published_at", "source", "author")
+
+    def __init__(self, title=None, description=None, content=None, url=None, published_at=None, source=None, author=None):
+        self.title = title
+        self.description = description
+        self.content = content
+        self.url = url
+        self.published_at = published_at
+        self.source = _intern(source)
+        self.author = _intern(author)
+
+    @classmethod
+    def from_dict(cls, data):
+        """Builds an Article from a raw NewsAPI article dict."""
+        source = data.get('source')
+        return cls(
+            data.get('title'),
+            data.get('description'),
+            data.get('content'),
+            data.get('url'),
+            data.get('publishedAt'),
+            source.get('name') if isinstance(source, dict) else source,
+            data.get('author'),
+        )
+
+    @classmethod
+    def from_tuple(cls, values):
+        """Builds an Article from the output of as_tuple()."""
+        return cls(*values)
+
+    def as_tuple(self):
+        """Returns the fields in __slots__ order, e.g. for the disk cache."""
+        return (self.title, self.description, self.content, self.url, self.published_at, self.source, self.author)
+
+    def to_dict(self):
+        """Returns the article in NewsAPI's field layout."""
+        return {
+            'title': self.title,
+            'description': self.description,
+            'content': self.content,
+            'url': self.url,
+            'publishedAt': self.published_at,
+            'source': {'name': self.source},
+            'author': self.author,
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, Article):
+            return NotImplemented
+        return self.as_tuple() == other.as_tuple()
+
+    def __hash__(self):
+        return hash(self.as_tuple())
+
+    def __repr__(self):
+        return f"Article(title={self.title!r}, source={self.source!r}, published_at={self.published_at!r})"
+
+
+def to_article(value):
+    """Converts a raw dict or an as_tuple() record into an Article."""
+    if isinstance(value, Article):
+        return value
+    if isinstance(value, dict):
+        return Article.from_dict(value)
+    return Article.from_tuple(value)
+
+
+def parse_response(data):
+    """Returns a copy of a NewsAPI response with 'articles' as Article records."""
+    parsed = {k: v for k, v in data.items() if k != 'articles'}
+    parsed['articles'] = [to_article(article) for article in data.get('articles') or []]
+    return parsed
+
+
+def pack_response(data):
+    """Returns a copy of a parsed response with articles as plain tuples for storage."""
+    packed = {k: v for k, v in data.items() if k != 'articles'}
+    packed['articles'] = [article.as_tuple() for article in data.get('articles') or []]
+    return packed
@@ -0,0 +1,298 @@
+import sqlite3
+import time
+from datetime import date, datetime, timedelta
+
+import db
+from article import Article
+
+# Local store of every article fetched from NewsAPI, with a full-text index
+ARTICLE_DATABASE_PATH = "news_articles.db"
+# NewsAPI searches the last month when no dates are given
+DEFAULT_SEARCH_DAYS = 30
+# Seconds after which coverage of the current day is considered stale
+TODAY_COVERAGE_TTL = 900
+# Relative BM25 weights for the title, description and content columns
+BM25_WEIGHTS = (10.0, 4.0, 1.0)
+
+
+def _parse_date(value):
+    if value is None or isinstance(value, date):
+        return value
+    return datetime.strptime(value[:10], '%Y-%m-%d').date()
+
+
+def default_date_range(from_date=None, to_date=None):
+    """Returns (from, to) dates, filling in NewsAPI's default window."""
+    to_date = _parse_date(to_date) or date.today()
+    from_date = _parse_date(from_date) or to_date - timedelta(days=DEFAULT_SEARCH_DAYS)
+    return from_date, to_date
+
+
+def fts_query(search_word):
+    """Turns a keyword string into an FTS5 query that matches all of its terms."""
+    terms = [term.replace('"', '""') for term in search_word.split()]
+    return " ".join(f'"{term}"' for term in terms)
+
+
+class ArticleStore:
+    """SQLite FTS5 index over every article the app has fetched.
+
+    Alongside the articles it records which (keyword, filters, date range)
+    combinations have already been fetched, so a local-first search only has
+    to go upstream for the dates nobody has fetched yet.
+    """
+
+    def __init__(self, path=ARTICLE_DATABASE_PATH):
+        self.path = path
+        self._pool = db.get_pool(path)
+        self._ready = False
+
+    def _connection(self):
+        if not self._ready:
+            with self._pool.connection() as conn:
+                conn.executescript('''
+                    CREATE TABLE IF NOT EXISTS articles (
+                        id INTEGER PRIMARY KEY,
+                        url TEXT NOT NULL UNIQUE,
+                        title TEXT,
+                        description TEXT,
+                        content TEXT,
+                        published_at TEXT,
+                        source TEXT,
+                        author TEXT
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_articles_published_at ON articles (published_at);
+
+                    -- The filter sets (see news_api.filters_key) each article was returned for
+                    CREATE TABLE IF NOT EXISTS article_filters (
+                        filters TEXT NOT NULL,
+                        article_id INTEGER NOT NULL,
+                        PRIMARY KEY (filters, article_id)
+                    ) WITHOUT ROWID;
+
+                    CREATE VIRTUAL TABLE IF NOT EXISTS articles_fts USING fts5 (
+                        title, description, content,
+                        content='articles', content_rowid='id'
+                    );
+
+                    CREATE TRIGGER IF NOT EXISTS articles_ai AFTER INSERT ON articles BEGIN
+                        INSERT INTO articles_fts (rowid, title, description, content)
+                        VALUES (new.id, new.title, new.description, new.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS articles_ad AFTER DELETE ON articles BEGIN
+                        INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+                        VALUES ('delete', old.id, old.title, old.description, old.content);
+                    END;
+                    CREATE TRIGGER IF NOT EXISTS articles_au AFTER UPDATE ON articles BEGIN
+                        INSERT INTO articles_fts (articles_fts, rowid, title, description, content)
+                        VALUES ('delete', old.id, old.title, old.description, old.content);
+                        INSERT INTO articles_fts (rowid, title, description, content)
+                        VALUES (new.id, new.title, new.description, new.content);
+                    END;
+
+                    CREATE TABLE IF NOT EXISTS coverage (
+                        keyword TEXT NOT NULL,
+                        filters TEXT NOT NULL,
+                        from_date TEXT NOT NULL,
+                        to_date TEXT NOT NULL,
+                        fetched_at REAL NOT NULL
+                    );
+                    CREATE INDEX IF NOT EXISTS idx_coverage_keyword ON coverage (keyword, filters);
+
+                    CREATE TABLE IF NOT EXISTS watermarks (
+                        keyword TEXT NOT NULL,
+                        filters TEXT NOT NULL,
+                        since TEXT,
+                        published_at TEXT NOT NULL,
+                        polled_at REAL NOT NULL,
+                        PRIMARY KEY (keyword, filters)
+                    );
+                ''')
+            self._ready = True
+        return self._pool.connection()
+
+    def ingest(self, articles, filters=None):
+        """Adds articles to the store; articles already stored (same URL) are updated.
+
+        filters is the key of the search filters the articles were returned
+        for; search() only returns articles recorded under the filters it asks for.
+        """
+        rows = [
+            (a.url, a.title, a.description, a.content, a.published_at, a.source, a.author)
+            for a in articles if a.url
+        ]
+        if not rows:
+            return 0
+        try:
+            with self._connection() as conn:
+                conn.executemany('''
+                    INSERT INTO articles (url, title, description, content, published_at, source, author)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (url) DO UPDATE SET
+                        title = excluded.title, description = excluded.description, content = excluded.content,
+                        published_at = excluded.published_at, source = excluded.source, author = excluded.author
+                    WHERE articles.title IS NOT excluded.title
+                       OR articles.description IS NOT excluded.description
+                       OR articles.content IS NOT excluded.content
+                ''', rows)
+                if filters is not None:
+                    conn.executemany(
+                        'INSERT OR IGNORE INTO article_filters (filters, article_id) SELECT ?, id FROM articles WHERE url = ?',
+                        [(filters, row[0]) for row in rows]
+                    )
+        except sqlite3.Error as e:
+            print(f"An error occurred while storing articles: {e}")
+            return 0
+        return len(rows)
+
+    def search(self, search_word, from_date=None, to_date=None, limit=100, filters=None, sort_by='relevancy'):
+        """Returns stored articles matching every keyword term, best BM25 match first.
+
+        With filters, only articles ingested for that filters key are returned.
+        sort_by='publishedAt' returns the newest matches first instead; other
+        NewsAPI orders have no local score and fall back to BM25.
+        """
+        query = fts_query(search_word)
+        if not query:
+            return []
+        from_date, to_date = default_date_range(from_date, to_date)
+        params = [query, from_date.isoformat(), (to_date + timedelta(days=1)).isoformat()]
+        order = "a.published_at DESC" if sort_by == 'publishedAt' else f"bm25(articles_fts, {', '.join(map(str, BM25_WEIGHTS))})"
+        filter_clause = ""
+        if filters is not None:
+            filter_clause = "AND a.id IN (SELECT article_id FROM article_filters WHERE filters = ?)"
+            params.append(filters)
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT a.title, a.description, a.content, a.url, a.published_at, a.source, a.author
+                    FROM articles_fts
+                    JOIN articles a ON a.id = articles_fts.rowid
+                    WHERE articles_fts MATCH ?
+                      AND a.published_at >= ? AND a.published_at < ?
+                      {filter_clause}
+                    ORDER BY {order}
+                    LIMIT ?
+                ''', (*params, limit)).fetchall()
+        except sqlite3.Error as e:
+            print(f"An error occurred while searching stored articles: {e}")
+            return []
+        return [Article.from_tuple(row) for row in rows]
+
+    def published_between(self, search_word, since, until, filters=None, limit=100):
+        """Returns stored articles matching every keyword term published in (since, until], newest first."""
+        query = fts_query(search_word)
+        if not query:
+            return []
+        params = [query, since, until]
+        filter_clause = ""
+        if filters is not None:
+            filter_clause = "AND a.id IN (SELECT article_id FROM article_filters WHERE filters = ?)"
+            params.append(filters)
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(f'''
+                    SELECT a.title, a.description, a.content, a.url, a.published_at, a.source, a.author
+                    FROM articles_fts
+                    JOIN articles a ON a.id = articles_fts.rowid
+                    WHERE articles_fts MATCH ?
+                      AND a.published_at > ? AND a.published_at <= ?
+                      {filter_clause}
+                    ORDER BY a.published_at DESC
+                    LIMIT ?
+                ''', (*params, limit)).fetchall()
+        except sqlite3.Error as e:
+            print(f"An error occurred while searching stored articles: {e}")
+            return []
+        return [Article.from_tuple(row) for row in rows]
+
+    def add_coverage(self, keyword, filters, from_date, to_date):
+        """Records that keyword/filters were fetched for every day in [from_date, to_date]."""
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    'INSERT INTO coverage (keyword, filters, from_date, to_date, fetched_at) VALUES (?, ?, ?, ?, ?)',
+                    (keyword, filters, _parse_date(from_date).isoformat(), _parse_date(to_date).isoformat(), time.time())
+                )
+        except sqlite3.Error as e:
+            print(f"An error occurred while recording coverage: {e}")
+
+    def uncovered_ranges(self, keyword, filters, from_date, to_date):
+        """Returns the (from, to) date ranges inside the request that were never fetched.
+
+        Coverage that includes the day it was fetched on only counts for that
+        day while it is younger than TODAY_COVERAGE_TTL, since new articles
+        keep arriving until the day is over.
+        """
+        from_date, to_date = default_date_range(from_date, to_date)
+        try:
+            with self._connection() as conn:
+                rows = conn.execute(
+                    'SELECT from_date, to_date, fetched_at FROM coverage WHERE keyword = ? AND filters = ? AND to_date >= ? AND from_date <= ?',
+                    (keyword, filters, from_date.isoformat(), to_date.isoformat())
+                ).fetchall()
+        except sqlite3.Error as e:
+            print(f"An error occurred while reading coverage: {e}")
+            rows = []
+
+        now = time.time()
+        intervals = []
+        for start, end, fetched_at in rows:
+            start, end = _parse_date(start), _parse_date(end)
+            fetched_day = date.fromtimestamp(fetched_at)
+            if end >= fetched_day and now - fetched_at > TODAY_COVERAGE_TTL:
+                end = fetched_day - timedelta(days=1)
+            if start <= end:
+                intervals.append((start, end))
+
+        gaps = []
+        cursor = from_date
+        for start, end in sorted(intervals):
+            if start > cursor:
+                gaps.append((cursor, min(start - timedelta(days=1), to_date)))
+            cursor = max(cursor, end + timedelta(days=1))
+            if cursor > to_date:
+                break
+        if cursor <= to_date:
+            gaps.append((cursor, to_date))
+        return gaps
+
+    def watermark(self, keyword, filters):
+        """Returns (since, published_at) for a watched search, or None.
+
+        Every article of the search published after since and up to
+        published_at has been polled into the store; since is '' when the
+        polls reached back to the oldest result.
+        """
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    'SELECT since, published_at FROM watermarks WHERE keyword = ? AND filters = ?', (keyword, filters)
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"An error occurred while reading the watermark: {e}")
+            return None
+        return tuple(row) if row else None
+
+    def set_watermark(self, keyword, filters, since, published_at):
+        """Records that the articles published in (since, published_at] were polled.
+
+        The range is merged with the saved one when they touch; otherwise the
+        newer of the two is kept.
+        """
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    'SELECT since, published_at FROM watermarks WHERE keyword = ? AND filters = ?', (keyword, filters)
+                ).fetchone()
+                if row and since <= row[1] and row[0] <= published_at:
+                    since, published_at = min(since, row[0]), max(published_at, row[1])
+                elif row and published_at < row[1]:
+                    return
+                conn.execute('''
+                    INSERT INTO watermarks (keyword, filters, since, published_at, polled_at) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (keyword, filters) DO UPDATE SET
+                        since = excluded.since, published_at = excluded.published_at, polled_at = excluded.polled_at
+                ''', (keyword, filters, since, published_at, time.time()))
+        except sqlite3.Error as e:
+            print(f"An error occurred while saving the watermark: {e}")
@@ -0,0 +1,94 @@
+import asyncio
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import news_api
+from ranking import merge_ranked
+
+# Maximum number of upstream requests in flight for one fan-out
+DEFAULT_CONCURRENCY = 8
+# Seconds to wait for a single source before giving up on it
+DEFAULT_TIMEOUT = 15
+
+# Blocking HTTP calls run here; a dedicated pool lets asyncio.run return
+# without waiting for a slow source that already timed out
+_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="news-fanout")
+
+
+def build_combinations(sources=None, countries=None, categories=None):
+    """Returns one (source, country, category) tuple per request to send."""
+    return list(itertools.product(
+        [s for s in sources or [] if s] or [None],
+        [c for c in countries or [] if c] or [None],
+        [c for c in categories or [] if c] or [None],
+    ))
+
+
+async def _fetch_one(semaphore, timeout, api_key, search_word, combination, options):
+    source, country, category = combination
+    call = functools.partial(
+        news_api.get_news, api_key, search_word,
+        sources=source, country=country, category=category, **options
+    )
+    async with semaphore:
+        try:
+            return await asyncio.wait_for(asyncio.get_running_loop().run_in_executor(_executor, call), timeout)
+        except (asyncio.TimeoutError, requests.RequestException) as e:
+            print(f"An error occurred while fetching {combination}: {e!r}")
+            return None
+
+
+async def fetch_news_fanout_async(api_key, search_word, sources=None, countries=None, categories=None, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, **options):
+    """Sends one request per source/country/category combination concurrently.
+
+    A combination that fails or takes longer than timeout is reported as None
+    and does not hold up the others. Extra keyword arguments (sort_by,
+    from_date, page_size, language, ...) are passed to news_api.get_news.
+    """
+    combinations = build_combinations(sources, countries, categories)
+    semaphore = asyncio.Semaphore(concurrency)
+    results = await asyncio.gather(*(
+        _fetch_one(semaphore, timeout, api_key, search_word, combination, options)
+        for combination in combinations
+    ))
+    return dict(zip(combinations, results))
+
+
+def interleave_articles(results, limit=None, sort_by='relevancy'):
+    """Merges per-combination results with a k-way merge so every source is represented."""
+    article_lists = [data.get('articles', []) for data in results.values() if data]
+    articles = []
+    seen = set()
+    for article in merge_ranked(article_lists, sort_by):
+        key = article.url or (article.title, article.published_at)
+        if key in seen:
+            continue
+        seen.add(key)
+        articles.append(article)
+        if limit is not None and len(articles) >= limit:
+            break
+    return articles
+
+
+def fetch_news_fanout(api_key, search_word, sources=None, countries=None, categories=None, limit=None, concurrency=DEFAULT_CONCURRENCY, timeout=DEFAULT_TIMEOUT, **options):
+    """Synchronous wrapper around fetch_news_fanout_async for the Streamlit script.
+
+    Returns a NewsAPI-shaped dict with the merged articles, plus the raw
+    per-combination responses under 'results', or None if every request failed.
+    """
+    results = asyncio.run(fetch_news_fanout_async(
+        api_key, search_word, sources, countries, categories, concurrency, timeout, **options
+    ))
+    if not any(results.values()):
+        return None
+
+    return {
+        'status': 'ok',
+        'totalResults': sum(data.get('totalResults', 0) for data in results.values() if data),
+        'articles': interleave_articles(results, limit, options.get('sort_by', 'relevancy')),
+        'results': results,
+        'failed': [combination for combination, data in results.items() if data is None],
+    }
@@ -0,0 +1,161 @@
+import csv
+import gzip
+import json
+import os
+import re
+import tempfile
+from datetime import datetime
+
+import news_api
+from dedupe import Deduplicator
+from render import OUTPUT_FIELDS
+
+# Directory that server-side exports are written to
+EXPORT_DIR = "exports"
+# Rows buffered before each write (one Parquet row group per chunk)
+EXPORT_CHUNK_SIZE = 500
+
+EXPORT_FORMATS = {
+    "CSV": "csv",
+    "JSONL": "jsonl",
+    "Parquet": "parquet",
+}
+
+
+def export_columns(output_format, include_date=False, include_url=True):
+    """Maps an output format choice ("Title Only", ...) to the columns to export."""
+    columns = list(OUTPUT_FIELDS.get(output_format, ("title", "description")))
+    if include_date:
+        columns.append("published_at")
+    if include_url:
+        columns.append("url")
+    return columns
+
+
+def iter_articles(api_key, search_word, max_articles, sort_by='relevancy', from_date=None, to_date=None, language=None, country=None, category=None, author=None, sources=None, near_duplicates=True):
+    """Yields articles page by page, so only one page is held in memory at a time.
+
+    Pages are requested without going through the response caches or the
+    article store, so a large export does not evict other sessions' entries.
+    Syndicated copies, and near-duplicates unless near_duplicates is False,
+    are dropped as they stream past.
+    """
+    page_size = news_api.MAX_PAGE_SIZE
+    deduplicator = Deduplicator(near_duplicates=near_duplicates)
+    page = 1
+    exported = 0
+
+    while exported < max_articles:
+        data = news_api.request_news(api_key, news_api.build_params(search_word, sort_by, from_date, to_date, page_size, page, language, country, category, author, sources))
+        if not data or not data['articles']:
+            return
+
+        for article in deduplicator.filter(data['articles']):
+            yield article
+            exported += 1
+            if exported >= max_articles:
+                return
+
+        if page * page_size >= data.get('totalResults', 0):
+            return
+        page += 1
+
+
+def _chunks(articles, columns, chunk_size):
+    chunk = []
+    for article in articles:
+        chunk.append([getattr(article, column) for column in columns])
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _open_text(path, compression):
+    if compression == "gzip":
+        return gzip.open(path, "wt", encoding="utf-8", newline="")
+    return open(path, "w", encoding="utf-8", newline="")
+
+
+def write_csv(articles, path, columns, compression=None, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = 0
+    with _open_text(path, compression) as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        for chunk in _chunks(articles, columns, chunk_size):
+            writer.writerows(chunk)
+            rows += len(chunk)
+    return rows
+
+
+def write_jsonl(articles, path, columns, compression=None, chunk_size=EXPORT_CHUNK_SIZE):
+    rows = 0
+    with _open_text(path, compression) as f:
+        for chunk in _chunks(articles, columns, chunk_size):
+            f.write("".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in chunk))
+            rows += len(chunk)
+    return rows
+
+
+def write_parquet(articles, path, columns, compression=None, chunk_size=EXPORT_CHUNK_SIZE):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("Parquet export requires pyarrow: pip install pyarrow")
+
+    schema = pa.schema([(column, pa.string()) for column in columns])
+    rows = 0
+    with pq.ParquetWriter(path, schema, compression=compression or "snappy") as writer:
+        for chunk in _chunks(articles, columns, chunk_size):
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array([row[i] for row in chunk], pa.string()) for i in range(len(columns))],
+                schema=schema
+            ))
+            rows += len(chunk)
+    return rows
+
+
+WRITERS = {
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+    "parquet": write_parquet,
+}
+
+
+def export_path(search_word, extension, compression=None, export_dir=EXPORT_DIR):
+    """Creates a new, uniquely named file in export_dir for an export of search_word and returns its path."""
+    os.makedirs(export_dir, exist_ok=True)
+    slug = re.sub(r"[^a-z0-9]+", "-", search_word.lower()).strip("-") or "news"
+    suffix = ".gz" if compression == "gzip" and extension != "parquet" else ""
+    # mkstemp adds a random part, so sessions exporting the same keyword at once get separate files
+    fd, path = tempfile.mkstemp(prefix=f"{slug}-{datetime.now():%Y%m%d-%H%M%S}-", suffix=f".{extension}{suffix}", dir=export_dir)
+    os.close(fd)
+    return path
+
+
+def take_export(path):
+    """Returns the contents of an export file and deletes it, so exports/ does not fill up."""
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    finally:
+        os.remove(path)
+
+
+def export_articles(articles, path, file_format, columns, compression=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Streams articles to path in the given format; returns the number of rows written.
+
+    compression is "gzip" for CSV/JSONL, or a Parquet codec ("snappy", "gzip", "zstd").
+    """
+    writer = WRITERS.get(file_format)
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    try:
+        return writer(articles, path, columns, compression, chunk_size)
+    except BaseException:
+        # Do not leave a partial file behind
+        if os.path.exists(path):
+            os.remove(path)
+        raise
@@ -0,0 +1,83 @@
+import re
+from types import MappingProxyType
+
+from authors import AUTHORS
+from categories import CATEGORIES
+from countries import COUNTRIES
+from news_sources import NEWS_SOURCES
+
+_WORD_RE = re.compile(r"\w+")
+# Trie node key holding the ids of the entries whose word ends at that node
+_END = ""
+
+
+class Catalog:
+    """Read-only lookup indexes over a list of {'id': ..., 'name': ...} records.
+
+    Built once at import: an id -> record map, a lowercase name -> id map and
+    a prefix trie over every word of each name (and the id), so labels are
+    dict lookups and type-ahead filtering only walks the typed prefix.
+    """
+
+    def __init__(self, records):
+        self.ids = tuple(record['id'] for record in records)
+        self.by_id = MappingProxyType({record['id']: MappingProxyType(dict(record)) for record in records})
+        self.name_to_id = MappingProxyType({record['name'].lower(): record['id'] for record in records})
+        self._position = {id_: i for i, id_ in enumerate(self.ids)}
+        self._trie = {}
+        for record in records:
+            for word in set(_WORD_RE.findall(f"{record['name']} {record['id']}".lower())):
+                node = self._trie
+                for char in word:
+                    node = node.setdefault(char, {})
+                node.setdefault(_END, []).append(record['id'])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, id_):
+        return id_ in self.by_id
+
+    def label(self, id_):
+        """Returns the display name for id_, or id_ itself if it is unknown."""
+        record = self.by_id.get(id_)
+        return record['name'] if record else id_
+
+    def id_for(self, name):
+        """Returns the id whose name matches name case-insensitively, or None."""
+        return self.name_to_id.get(name.lower())
+
+    def _complete(self, word):
+        node = self._trie
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return set()
+        ids = set()
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            for key, child in node.items():
+                if key == _END:
+                    ids.update(child)
+                else:
+                    stack.append(child)
+        return ids
+
+    def search(self, text, limit=None):
+        """Returns the ids whose name has a word starting with every word of text, in catalog order."""
+        words = _WORD_RE.findall(text.lower())
+        if not words:
+            return list(self.ids[:limit])
+        ids = self._complete(words[0])
+        for word in words[1:]:
+            if not ids:
+                break
+            ids &= self._complete(word)
+        return sorted(ids, key=self._position.__getitem__)[:limit]
+
+
+SOURCES = Catalog(NEWS_SOURCES)
+COUNTRY_CATALOG = Catalog([{'id': code, 'name': name} for code, name in COUNTRIES.items()])
+CATEGORY_CATALOG = Catalog([{'id': key, 'name': name} for key, name in CATEGORIES.items()])
+AUTHOR_CATALOG = Catalog([{'id': name, 'name': name, 'email': email} for name, email in AUTHORS.items()])
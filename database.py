@@ -1,118 +1,152 @@
 import sqlite3
 
-# Function to create a database and tables
-def create_table():
-    conn = sqlite3.connect('news_search.db')
-    cursor = conn.cursor()
-    
-    # Create table for storing API key
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS api_key (
-            id INTEGER PRIMARY KEY,
-            key TEXT NOT NULL
-        )
-    ''')
-    
-    # Create table for storing user preferences
-    cursor.execute('''
-        CREATE TABLE IF NOT EXISTS user_preferences (
-            id INTEGER PRIMARY KEY,
-            language TEXT,
-            sources TEXT,
-            output_format TEXT
-        )
-    ''')
-    
-    conn.commit()
-    conn.close()
-
-# Function to save API key
+import db
+from migrations import APP_DATABASE_PATH as DATABASE_PATH
+from read_cache import ReadThroughCache
+
+# API keys and preferences are read on every rerun but only change when saved
+settings_cache = ReadThroughCache(DATABASE_PATH + ".versions")
+
+# Function to save API key (replaces the primary key only; the rest of the key pool is kept)
 def save_api_key(api_key):
-    conn = sqlite3.connect('news_search.db')
-    cursor = conn.cursor()
-    
     try:
-        if api_key is None:
-            cursor.execute('DELETE FROM api_key')  # Clear existing API key
-        else:
-            cursor.execute('DELETE FROM api_key')  # Clear existing API key
-            cursor.execute('INSERT INTO api_key (key) VALUES (?)', (api_key,))
-        conn.commit()
+        with db.connection(DATABASE_PATH) as conn:
+            primary = conn.execute('SELECT id FROM api_key ORDER BY id LIMIT 1').fetchone()
+            if api_key is None:
+                if primary:
+                    conn.execute('DELETE FROM api_key WHERE id = ?', primary)  # Remove the primary key
+            elif primary is None:
+                conn.execute('INSERT INTO api_key (key) VALUES (?)', (api_key,))
+            else:
+                # The new key may already be in the pool; it moves into the primary slot with its weight
+                pooled = conn.execute('SELECT weight FROM api_key WHERE key = ? AND id != ?', (api_key, primary[0])).fetchone()
+                if pooled:
+                    conn.execute('DELETE FROM api_key WHERE key = ? AND id != ?', (api_key, primary[0]))
+                    conn.execute('UPDATE api_key SET key = ?, weight = ? WHERE id = ?', (api_key, pooled[0], primary[0]))
+                else:
+                    conn.execute('UPDATE api_key SET key = ? WHERE id = ?', (api_key, primary[0]))
     except sqlite3.Error as e:
         print(f"An error occurred while saving the API key: {e}")
-    finally:
-        conn.close()
+    settings_cache.invalidate()
+
+def _query_api_key():
+    with db.connection(DATABASE_PATH) as conn:
+        result = conn.execute('SELECT key FROM api_key ORDER BY id').fetchone()
+    return result[0] if result else None
 
 # Function to load API key
 def load_api_key():
-    conn = sqlite3.connect('news_search.db')
-    cursor = conn.cursor()
-    
     try:
-        cursor.execute('SELECT key FROM api_key')
-        result = cursor.fetchone()
-        return result[0] if result else None
+        return settings_cache.get('api_key', _query_api_key)
     except sqlite3.Error as e:
         print(f"An error occurred while loading the API key: {e}")
         return None
-    finally:
-        conn.close()
-
-# Function to save user preferences
-def save_user_preferences(preferences):
-    conn = sqlite3.connect('news_search.db')
-    cursor = conn.cursor()
-    
+
+# Function to add an API key to the key pool (or change its weight)
+def add_api_key(api_key, weight=1):
     try:
-        # Check if there are any existing preferences
-        cursor.execute('SELECT COUNT(*) FROM user_preferences')
-        existing_preferences = cursor.fetchone()[0]
-        
-        if existing_preferences > 0:
-            # Update existing preferences
-            cursor.execute('''
-                UPDATE user_preferences
-                SET language = ?, sources = ?, output_format = ?
-            ''', (preferences['language'], ','.join(preferences['sources']), preferences['output_format']))
-        else:
-            # Insert new preferences
-            cursor.execute('''
-                INSERT INTO user_preferences (language, sources, output_format)
-                VALUES (?, ?, ?)
-            ''', (preferences['language'], ','.join(preferences['sources']), preferences['output_format']))
-        
-        conn.commit()
+        with db.connection(DATABASE_PATH) as conn:
+            conn.execute('''
+                INSERT INTO api_key (key, weight) VALUES (?, ?)
+                ON CONFLICT (key) DO UPDATE SET weight = excluded.weight
+            ''', (api_key, weight))
     except sqlite3.Error as e:
-        print(f"An error occurred while saving user preferences: {e}")
-    finally:
-        conn.close()
-
-# Function to load user preferences
-def load_user_preferences():
-    conn = sqlite3.connect('news_search.db')
-    cursor = conn.cursor()
-    
+        print(f"An error occurred while adding the API key: {e}")
+    settings_cache.invalidate()
+
+# Function to remove a single API key from the key pool
+def remove_api_key(api_key):
     try:
-        cursor.execute('SELECT language, sources, output_format FROM user_preferences')
-        result = cursor.fetchone()
-        
-        if result:
-            return {
-                'language': result[0],
-                'sources': result[1].split(',') if result[1] else [],
-                'output_format': result[2]
-            }
+        with db.connection(DATABASE_PATH) as conn:
+            conn.execute('DELETE FROM api_key WHERE key = ?', (api_key,))
+    except sqlite3.Error as e:
+        print(f"An error occurred while removing the API key: {e}")
+    settings_cache.invalidate()
+
+def _query_api_keys():
+    with db.connection(DATABASE_PATH) as conn:
+        return tuple(conn.execute('SELECT key, weight FROM api_key ORDER BY id').fetchall())
+
+# Function to load every API key in the pool as (key, weight) pairs
+def load_api_keys():
+    try:
+        return list(settings_cache.get('api_keys', _query_api_keys))
+    except sqlite3.Error as e:
+        print(f"An error occurred while loading the API keys: {e}")
+        return []
+
+# Most usernames bound in one IN (...) query; SQLite's default limit is 999 parameters
+PREFERENCES_BATCH_SIZE = 500
+
+def _preferences_row(username, preferences):
+    return (username, preferences['language'], ','.join(preferences['sources']), preferences['output_format'])
+
+def _preferences_from_row(row):
+    if not row:
         return {
             'language': None,
             'sources': [],
             'output_format': None
         }  # Return default values if no preferences are found
+    return {
+        'language': row[0],
+        'sources': row[1].split(',') if row[1] else [],
+        'output_format': row[2]
+    }
+
+_UPSERT_PREFERENCES = '''
+    INSERT INTO user_preferences (username, language, sources, output_format, updated_at)
+    VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+    ON CONFLICT (username) DO UPDATE SET
+        language = excluded.language, sources = excluded.sources,
+        output_format = excluded.output_format, updated_at = excluded.updated_at
+'''
+
+# Function to save one user's preferences ('' is the user of the single-user app)
+def save_user_preferences(preferences, username=''):
+    try:
+        with db.connection(DATABASE_PATH) as conn:
+            conn.execute(_UPSERT_PREFERENCES, _preferences_row(username, preferences))
+    except sqlite3.Error as e:
+        print(f"An error occurred while saving user preferences: {e}")
+    settings_cache.invalidate(('user_preferences', username))
+
+# Function to save the preferences of many users in one transaction
+def save_user_preferences_many(preferences_by_user):
+    try:
+        with db.connection(DATABASE_PATH) as conn:
+            conn.executemany(_UPSERT_PREFERENCES, [
+                _preferences_row(username, preferences) for username, preferences in preferences_by_user.items()
+            ])
+    except sqlite3.Error as e:
+        print(f"An error occurred while saving user preferences: {e}")
+    if preferences_by_user:
+        settings_cache.invalidate(*[('user_preferences', username) for username in preferences_by_user])
+
+def _query_user_preferences(username):
+    with db.connection(DATABASE_PATH) as conn:
+        return conn.execute('SELECT language, sources, output_format FROM user_preferences WHERE username = ?', (username,)).fetchone()
+
+# Function to load one user's preferences
+def load_user_preferences(username=''):
+    try:
+        return _preferences_from_row(settings_cache.get(('user_preferences', username), lambda: _query_user_preferences(username)))
     except sqlite3.Error as e:
         print(f"An error occurred while loading user preferences: {e}")
-        return {
-            'language': None,
-            'sources': [],
-            'output_format': None
-        }
-    finally:
-        conn.close()
+        return _preferences_from_row(None)
+
+# Function to load the preferences of many users, one primary-key lookup per batch of usernames
+def load_user_preferences_many(usernames):
+    usernames = list(dict.fromkeys(usernames))
+    rows = {}
+    try:
+        with db.connection(DATABASE_PATH) as conn:
+            for start in range(0, len(usernames), PREFERENCES_BATCH_SIZE):
+                batch = usernames[start:start + PREFERENCES_BATCH_SIZE]
+                rows.update((row[0], row[1:]) for row in conn.execute(
+                    f'SELECT username, language, sources, output_format FROM user_preferences WHERE username IN ({", ".join("?" * len(batch))})',
+                    batch
+                ))
+    except sqlite3.Error as e:
+        print(f"An error occurred while loading user preferences: {e}")
+    return {username: _preferences_from_row(rows.get(username)) for username in usernames}
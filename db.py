@@ -0,0 +1,132 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+# Seconds a connection waits on a locked database before giving up
+BUSY_TIMEOUT = 5
+# Idle connections kept open per database file
+MAX_IDLE_CONNECTIONS = 8
+# Compiled statements cached per connection, so repeated queries skip the prepare step
+STATEMENT_CACHE_SIZE = 256
+# Applied once when a connection is opened; cache_size is negative KiB (8 MiB)
+PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8192",
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+class ConnectionPool:
+    """Reusable, pre-tuned connections to one SQLite database.
+
+    Streamlit runs reruns on short-lived threads, so connections are not tied
+    to a thread: each one is borrowed for the length of a with block and then
+    handed back, keeping its page cache and compiled statements warm for the
+    next caller instead of being closed.
+    """
+
+    def __init__(self, path, max_idle=MAX_IDLE_CONNECTIONS, initializer=None):
+        self.path = path
+        self.max_idle = max_idle
+        self.initializer = initializer
+        self._initialized = initializer is None
+        self._init_lock = threading.Lock()
+        self._idle = []
+        self._lock = threading.Lock()
+        self.opened = 0
+        self.reused = 0
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        for pragma in PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    def _initialize(self, conn):
+        with self._init_lock:
+            if not self._initialized:
+                self.initializer(conn)
+                self._initialized = True
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection; commits on a clean exit and rolls back on an exception."""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                self.opened += 1
+            else:
+                self.reused += 1
+        if conn is None:
+            conn = self._open()
+
+        try:
+            if not self._initialized:
+                self._initialize(conn)
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            with self._lock:
+                if len(self._idle) < self.max_idle:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def close(self):
+        """Closes every idle connection."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            return {"opened": self.opened, "reused": self.reused, "idle": len(self._idle)}
+
+
+_pools = {}
+_initializers = {}
+_pools_lock = threading.Lock()
+
+
+def register_initializer(path, initializer):
+    """Runs initializer(conn) once per process, before the first connection to path is used."""
+    with _pools_lock:
+        _initializers[path] = initializer
+        pool = _pools.get(path)
+        if pool is not None and pool.initializer is None:
+            pool.initializer = initializer
+            pool._initialized = False
+
+
+def get_pool(path):
+    """Returns the process-wide pool for the database at path."""
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = _pools[path] = ConnectionPool(path, initializer=_initializers.get(path))
+        return pool
+
+
+def connection(path):
+    """Shortcut for get_pool(path).connection()."""
+    return get_pool(path).connection()
+
+
+def close_all():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close()
+
+
+def get_pool_stats():
+    """Returns opened/reused/idle counts for every database in use."""
+    with _pools_lock:
+        return {path: pool.stats() for path, pool in _pools.items()}
@@ -0,0 +1,158 @@
+import hashlib
+import random
+import re
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+# Query parameters that only track where a click came from
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "dclid", "msclkid", "mc_cid", "mc_eid", "igshid",
+    "ref", "ref_src", "referrer", "cmpid", "ocid", "smid", "smtyp", "ito",
+    "taid", "guccounter",
+}
+TRACKING_PREFIXES = ("utm_", "at_", "pk_", "ga_")
+
+# MinHash signature length and LSH banding (BANDS * ROWS == NUM_PERM)
+NUM_PERM = 64
+BANDS = 16
+ROWS = 4
+# Estimated Jaccard similarity above which two articles count as near-duplicates;
+# high enough that templated headlines ("... day 901", "... day 902") stay distinct
+NEAR_DUPLICATE_THRESHOLD = 0.8
+SHINGLE_SIZE = 3
+
+# Each "permutation" XORs the 64-bit shingle hash with a fixed random mask;
+# much cheaper in pure Python than (a * h + b) % p and close enough for MinHash
+_rng = random.Random(1)
+_MASKS = [_rng.getrandbits(64) for _ in range(NUM_PERM)]
+
+_WORD_RE = re.compile(r"\w+")
+# NewsAPI titles often end in " - Source Name"
+_TITLE_SUFFIX_RE = re.compile(r"\s+[-|–—]\s+([^-|–—]{1,60})$")
+
+
+def canonicalize_url(url):
+    """Normalizes a URL so syndicated and tracked links to one page compare equal."""
+    if not url:
+        return None
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if host.startswith("m.") or host.startswith("amp."):
+        host = host.split(".", 1)[1]
+    path = re.sub(r"/(amp/?)?$", "", parts.path) or "/"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in TRACKING_PARAMS and not k.lower().startswith(TRACKING_PREFIXES)
+    )
+    return f"{host}{path}" + (f"?{urlencode(query)}" if query else "")
+
+
+def normalize_title(title, source=None):
+    """Lowercases a title and strips punctuation and a trailing " - Source" suffix.
+
+    The suffix is only stripped when it is the article's source name, so
+    titles like "Apple unveils iPhone - and it's cheaper" keep their ending.
+    """
+    if not title:
+        return ""
+    match = _TITLE_SUFFIX_RE.search(title)
+    if match and source and match.group(1).strip().casefold() == source.strip().casefold():
+        title = title[:match.start()]
+    return " ".join(_WORD_RE.findall(title.lower()))
+
+
+def _hash64(text):
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little")
+
+
+def minhash_signature(text, shingle_size=SHINGLE_SIZE):
+    """Returns the MinHash signature of the word shingles of text, or None if too short."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < shingle_size:
+        return None
+    shingles = {_hash64(" ".join(words[i:i + shingle_size])) for i in range(len(words) - shingle_size + 1)}
+    return tuple(min(h ^ mask for h in shingles) for mask in _MASKS)
+
+
+def estimate_similarity(signature_a, signature_b):
+    """Estimates the Jaccard similarity of two shingle sets from their signatures."""
+    return sum(x == y for x, y in zip(signature_a, signature_b)) / len(signature_a)
+
+
+class Deduplicator:
+    """Drops exact and near-duplicate articles from a stream of articles.
+
+    Each article is checked in three stages: canonical URL, exact normalized
+    title, then MinHash/LSH over title + description. Every check is a few
+    dict lookups, so the cost per article does not grow with the number of
+    articles already seen. With near_duplicates=False only the URL and title
+    checks run.
+    """
+
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD, near_duplicates=True):
+        self.threshold = threshold
+        self.near_duplicates_enabled = near_duplicates
+        self._urls = set()
+        self._titles = set()
+        self._buckets = {}
+        self._signatures = []
+        self.url_duplicates = 0
+        self.title_duplicates = 0
+        self.near_duplicates = 0
+
+    @property
+    def removed(self):
+        return self.url_duplicates + self.title_duplicates + self.near_duplicates
+
+    def add(self, article):
+        """Returns True if article is new, False if it duplicates one already added."""
+        url = canonicalize_url(article.url)
+        if url is not None:
+            if url in self._urls:
+                self.url_duplicates += 1
+                return False
+
+        title = normalize_title(article.title, article.source)
+        if title and title in self._titles:
+            self.title_duplicates += 1
+            return False
+
+        signature = minhash_signature(f"{title} {article.description or ''}") if self.near_duplicates_enabled else None
+        bands = []
+        if signature is not None:
+            bands = [(i, signature[i * ROWS:(i + 1) * ROWS]) for i in range(BANDS)]
+            candidates = {index for band in bands for index in self._buckets.get(band, ())}
+            for index in candidates:
+                if estimate_similarity(signature, self._signatures[index]) >= self.threshold:
+                    self.near_duplicates += 1
+                    return False
+
+        if url is not None:
+            self._urls.add(url)
+        if title:
+            self._titles.add(title)
+        if signature is not None:
+            index = len(self._signatures)
+            self._signatures.append(signature)
+            for band in bands:
+                self._buckets.setdefault(band, []).append(index)
+        return True
+
+    def filter(self, articles):
+        """Yields only the articles that are not duplicates, keeping their order."""
+        for article in articles:
+            if self.add(article):
+                yield article
+
+    def stats(self):
+        return {
+            "url_duplicates": self.url_duplicates,
+            "title_duplicates": self.title_duplicates,
+            "near_duplicates": self.near_duplicates,
+        }
+
+
+def unique_articles(articles, near_duplicates=True):
+    """Convenience wrapper: yields articles with duplicates removed."""
+    return Deduplicator(near_duplicates=near_duplicates).filter(articles)
@@ -0,0 +1,159 @@
+import json
+import marshal
+import sqlite3
+import threading
+import time
+
+import db
+
+# Lives next to news_app.db so every Streamlit worker on the host shares it
+CACHE_DATABASE_PATH = "news_cache.db"
+DEFAULT_TTL = 900  # seconds
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+# Run a size check after this many writes instead of after every write
+COMPACT_EVERY = 50
+
+
+class DiskCache:
+    """SQLite-backed response cache shared by every process on the host.
+
+    Payloads are stored with marshal rather than JSON, so a warm read only
+    needs a marshal.loads instead of re-parsing the NewsAPI response text.
+    """
+
+    def __init__(self, path=CACHE_DATABASE_PATH, ttl=DEFAULT_TTL, max_bytes=MAX_CACHE_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._pool = db.get_pool(path)
+        self._ready = False
+        self._writes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _connection(self):
+        if not self._ready:
+            with self._pool.connection() as conn:
+                conn.execute('''
+                    CREATE TABLE IF NOT EXISTS response_cache (
+                        key TEXT PRIMARY KEY,
+                        payload BLOB NOT NULL,
+                        size INTEGER NOT NULL,
+                        created_at REAL NOT NULL,
+                        expires_at REAL NOT NULL
+                    )
+                ''')
+                conn.execute('CREATE INDEX IF NOT EXISTS idx_response_cache_expires_at ON response_cache (expires_at)')
+            self._ready = True
+        return self._pool.connection()
+
+    @staticmethod
+    def _encode_key(key):
+        return json.dumps(key, separators=(",", ":"))
+
+    def get(self, key):
+        """Returns the cached value for key, or None if missing or expired."""
+        try:
+            with self._connection() as conn:
+                row = conn.execute(
+                    'SELECT payload FROM response_cache WHERE key = ? AND expires_at > ?',
+                    (self._encode_key(key), time.time())
+                ).fetchone()
+        except sqlite3.Error as e:
+            print(f"An error occurred while reading the disk cache: {e}")
+            return None
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        try:
+            value = marshal.loads(row[0])
+        except (ValueError, EOFError, TypeError):
+            # Written by an incompatible interpreter; drop it and refetch
+            self.invalidate(key)
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None):
+        """Stores value under key and compacts the cache when it grows too large."""
+        try:
+            payload = marshal.dumps(value)
+        except ValueError:
+            return
+
+        now = time.time()
+        expires_at = now + (self.ttl if ttl is None else ttl)
+        try:
+            with self._connection() as conn:
+                conn.execute(
+                    'INSERT OR REPLACE INTO response_cache (key, payload, size, created_at, expires_at) VALUES (?, ?, ?, ?, ?)',
+                    (self._encode_key(key), payload, len(payload), now, expires_at)
+                )
+        except sqlite3.Error as e:
+            print(f"An error occurred while writing the disk cache: {e}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            should_compact = self._writes % COMPACT_EVERY == 0
+        if should_compact:
+            self.compact()
+
+    def invalidate(self, key):
+        """Removes a single entry from the cache."""
+        try:
+            with self._connection() as conn:
+                conn.execute('DELETE FROM response_cache WHERE key = ?', (self._encode_key(key),))
+        except sqlite3.Error as e:
+            print(f"An error occurred while invalidating the disk cache: {e}")
+
+    def compact(self):
+        """Deletes expired entries, then the oldest ones until under max_bytes."""
+        try:
+            with self._connection() as conn:
+                conn.execute('DELETE FROM response_cache WHERE expires_at <= ?', (time.time(),))
+                total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM response_cache').fetchone()[0]
+                if total > self.max_bytes:
+                    excess = total - self.max_bytes
+                    rows = conn.execute('SELECT key, size FROM response_cache ORDER BY created_at')
+                    stale_keys = []
+                    for cache_key, size in rows:
+                        if excess <= 0:
+                            break
+                        stale_keys.append((cache_key,))
+                        excess -= size
+                    conn.executemany('DELETE FROM response_cache WHERE key = ?', stale_keys)
+        except sqlite3.Error as e:
+            print(f"An error occurred while compacting the disk cache: {e}")
+
+    def clear(self):
+        """Removes every entry from the cache."""
+        try:
+            with self._connection() as conn:
+                conn.execute('DELETE FROM response_cache')
+        except sqlite3.Error as e:
+            print(f"An error occurred while clearing the disk cache: {e}")
+
+    def stats(self):
+        """Returns hit/miss counters and the on-disk size of the cache."""
+        try:
+            with self._connection() as conn:
+                entries, total = conn.execute(
+                    'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM response_cache'
+                ).fetchone()
+        except sqlite3.Error:
+            entries, total = 0, 0
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
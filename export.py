@@ -0,0 +1,51 @@
+from collections import OrderedDict
+
+# Text written per article for each output format in "Save Results"
+EXPORT_TEMPLATES = {
+    "Title and Description": "**{title}**\n{description}\n\n",
+    "Title Only": "**{title}**\n\n",
+    "Description Only": "{description}\n\n",
+    "Content Only": "**{title}**\n{content}\n\n",
+    "Title, Description and Content": "**{title}**\n{description}\n{content}\n\n",
+}
+
+
+def build_results_text(articles, output_format):
+    """Returns the export text for articles, built in one pass with str.join."""
+    template = EXPORT_TEMPLATES.get(output_format)
+    if template is None:
+        return ""
+    return "".join([
+        template.format(title=article.title, description=article.description, content=article.content)
+        for article in articles
+    ])
+
+
+class ExportCache:
+    """Remembers the export text for the most recent result sets.
+
+    Entries are keyed by (results_key, version, output_format, sort_by), so
+    reruns reuse the text instead of rebuilding it, switching formats or sort
+    orders back and forth does not rebuild either, and a result set stored
+    again under the same key (a new ResultSets version) never gets stale text.
+    """
+
+    def __init__(self, max_entries=4):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get_text(self, results_key, version, articles, output_format, sort_by=None):
+        key = (results_key, version, output_format, sort_by)
+        text = self._entries.get(key)
+        if text is None:
+            text = self._entries[key] = build_results_text(articles, output_format)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        else:
+            self._entries.move_to_end(key)
+        return text
+
+    def invalidate(self, results_key):
+        """Drops the text of every format for a result set that has changed."""
+        for key in [key for key in self._entries if key[0] == results_key]:
+            del self._entries[key]
@@ -0,0 +1,102 @@
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+# Number of per-host connection pools kept alive (one per distinct host)
+POOL_CONNECTIONS = 10
+# Maximum number of open connections kept to a single host
+POOL_MAXSIZE = 20
+# Block instead of opening extra connections once a host reaches POOL_MAXSIZE
+POOL_BLOCK = True
+# Default timeout (connect, read) in seconds for every request
+DEFAULT_TIMEOUT = (5, 30)
+
+DEFAULT_HEADERS = {
+    "Accept": "application/json",
+    "Accept-Encoding": "gzip, deflate",
+    "Connection": "keep-alive",
+    "User-Agent": "NextNewsSearch/1.0",
+}
+
+_session = None
+_adapter = None
+_lock = threading.Lock()
+
+
+def _build_session():
+    """Creates a requests session with a pooled, keep-alive transport."""
+    adapter = HTTPAdapter(pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, pool_block=POOL_BLOCK)
+    session = requests.Session()
+    session.headers.update(DEFAULT_HEADERS)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session, adapter
+
+
+def get_session():
+    """Returns the process-wide HTTP session, creating it on first use."""
+    global _session, _adapter
+    if _session is None:
+        with _lock:
+            if _session is None:
+                _session, _adapter = _build_session()
+    return _session
+
+
+def configure(pool_connections=None, pool_maxsize=None, pool_block=None):
+    """Changes the pool limits and rebuilds the shared session."""
+    global POOL_CONNECTIONS, POOL_MAXSIZE, POOL_BLOCK, _session, _adapter
+    with _lock:
+        if pool_connections is not None:
+            POOL_CONNECTIONS = pool_connections
+        if pool_maxsize is not None:
+            POOL_MAXSIZE = pool_maxsize
+        if pool_block is not None:
+            POOL_BLOCK = pool_block
+        if _session is not None:
+            _session.close()
+        _session, _adapter = _build_session()
+
+
+def get(url, params=None, timeout=DEFAULT_TIMEOUT, **kwargs):
+    """Sends a GET request through the shared connection pool."""
+    return get_session().get(url, params=params, timeout=timeout, **kwargs)
+
+
+def get_pool_stats():
+    """Returns connection pool hit/miss counters for the shared session.
+
+    A miss is a request that had to open a new connection (DNS, TCP and TLS
+    handshake); a hit is a request served on a reused keep-alive connection.
+    """
+    stats = {"requests": 0, "hits": 0, "misses": 0, "hosts": {}}
+    if _adapter is None:
+        return stats
+
+    pools = _adapter.poolmanager.pools
+    with pools.lock:
+        host_pools = list(pools._container.values())
+
+    for pool in host_pools:
+        requests_made = pool.num_requests
+        connections_opened = pool.num_connections
+        stats["hosts"][pool.host] = {
+            "requests": requests_made,
+            "hits": max(requests_made - connections_opened, 0),
+            "misses": connections_opened,
+        }
+        stats["requests"] += requests_made
+        stats["misses"] += connections_opened
+
+    stats["hits"] = max(stats["requests"] - stats["misses"], 0)
+    return stats
+
+
+def close():
+    """Closes every pooled connection held by the shared session."""
+    global _session, _adapter
+    with _lock:
+        if _session is not None:
+            _session.close()
+        _session = None
+        _adapter = None
@@ -0,0 +1,145 @@
+import os
+
+import db
+
+# The one database file for API keys, preferences, users and sessions
+APP_DATABASE_PATH = "news_app.db"
+# Files that used to hold part of that data; imported once by migration 2
+LEGACY_DATABASES = {
+    "legacy_search": "news_search.db",
+    "legacy_users": "users.db",
+}
+
+
+def _create_schema(conn):
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS api_key (
+            id INTEGER PRIMARY KEY,
+            key TEXT NOT NULL,
+            weight INTEGER NOT NULL DEFAULT 1
+        )
+    ''')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_api_key_key ON api_key (key)')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS user_preferences (
+            id INTEGER PRIMARY KEY,
+            language TEXT,
+            sources TEXT,
+            output_format TEXT
+        )
+    ''')
+
+    # news_app.db already had users (username, password) and sessions tables
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            password TEXT NOT NULL
+        )
+    ''')
+    columns = {row[1] for row in conn.execute('PRAGMA table_info(users)')}
+    for column in ("full_name", "country", "email"):
+        if column not in columns:
+            conn.execute(f'ALTER TABLE users ADD COLUMN {column} TEXT')
+    conn.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_users_email ON users (email)')
+
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sessions (
+            session_id TEXT PRIMARY KEY,
+            username TEXT NOT NULL,
+            last_activity DATETIME
+        )
+    ''')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_username ON sessions (username)')
+
+
+def _legacy_columns(conn, schema, table):
+    return [row[1] for row in conn.execute(f'PRAGMA {schema}.table_info({table})')]
+
+
+def _import_legacy_data(conn):
+    attached = {row[1] for row in conn.execute('PRAGMA database_list')}
+
+    if "legacy_search" in attached:
+        if _legacy_columns(conn, "legacy_search", "api_key"):
+            conn.execute('INSERT OR IGNORE INTO api_key (key, weight) SELECT key, 1 FROM legacy_search.api_key ORDER BY id')
+        if _legacy_columns(conn, "legacy_search", "user_preferences") and not conn.execute('SELECT 1 FROM user_preferences').fetchone():
+            conn.execute('INSERT INTO user_preferences (language, sources, output_format) SELECT language, sources, output_format FROM legacy_search.user_preferences')
+
+    if "legacy_users" in attached:
+        legacy_columns = _legacy_columns(conn, "legacy_users", "users")
+        columns = [c for c in ("username", "password", "full_name", "country", "email") if c in legacy_columns]
+        if "username" in columns and "password" in columns:
+            names = ", ".join(columns)
+            conn.execute(f'INSERT OR IGNORE INTO users ({names}) SELECT {names} FROM legacy_users.users')
+
+
+def _key_preferences_by_user(conn):
+    # The old table held one global row; it becomes the preferences of the anonymous user ''
+    conn.execute('''
+        CREATE TABLE user_preferences_by_user (
+            username TEXT PRIMARY KEY,
+            language TEXT,
+            sources TEXT,
+            output_format TEXT,
+            updated_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+        ) WITHOUT ROWID
+    ''')
+    conn.execute('''
+        INSERT INTO user_preferences_by_user (username, language, sources, output_format)
+        SELECT '', language, sources, output_format FROM user_preferences ORDER BY id LIMIT 1
+    ''')
+    conn.execute('DROP TABLE user_preferences')
+    conn.execute('ALTER TABLE user_preferences_by_user RENAME TO user_preferences')
+
+
+def _index_session_activity(conn):
+    # Lets the expired-session sweep delete by range instead of scanning every session
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_sessions_last_activity ON sessions (last_activity)')
+
+
+# (version, description, function); append new migrations, never edit applied ones
+MIGRATIONS = [
+    (1, "create tables and indexes", _create_schema),
+    (2, "import news_search.db and users.db", _import_legacy_data),
+    (3, "key user_preferences by username", _key_preferences_by_user),
+    (4, "index sessions by last_activity", _index_session_activity),
+]
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def migrate(conn):
+    """Brings the database up to SCHEMA_VERSION, recorded in PRAGMA user_version.
+
+    Pending migrations run inside one BEGIN IMMEDIATE transaction, so when
+    several processes start at once only one applies them and the others
+    see the new version.
+    """
+    if conn.execute('PRAGMA user_version').fetchone()[0] >= SCHEMA_VERSION:
+        return
+
+    # ATTACH is not allowed inside a transaction
+    attached = []
+    for schema, path in LEGACY_DATABASES.items():
+        if os.path.exists(path) and os.path.abspath(path) != os.path.abspath(APP_DATABASE_PATH):
+            conn.execute('ATTACH DATABASE ? AS ' + schema, (path,))
+            attached.append(schema)
+
+    try:
+        conn.execute('BEGIN IMMEDIATE')
+        version = conn.execute('PRAGMA user_version').fetchone()[0]
+        for target, description, apply in MIGRATIONS:
+            if target > version:
+                apply(conn)
+                conn.execute(f'PRAGMA user_version = {target}')
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        for schema in attached:
+            conn.execute('DETACH DATABASE ' + schema)
+
+
+# Runs before the first connection of each process is handed out
+db.register_initializer(APP_DATABASE_PATH, migrate)
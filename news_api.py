@@ -0,0 +1,302 @@
+import json
+import math
+from datetime import datetime, timezone
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import http_client
+from article import Article, pack_response, parse_response
+from article_store import ArticleStore
+from api_key import key_pool, get_api_key, refresh_keys
+from disk_cache import DiskCache
+from news_stream import ArticleStream
+from rate_limiter import RateLimited, RequestScheduler
+from response_cache import TTLCache, make_cache_key, normalize_keyword
+from single_flight import SingleFlight
+
+NEWS_API_URL = "https://newsapi.org/v2/everything"
+# NewsAPI never returns more than this many articles per page
+MAX_PAGE_SIZE = 100
+# Upper bound on concurrent page requests for a single search
+PAGE_WORKERS = 4
+
+# Shared by every session in this process, so repeat searches skip the network
+response_cache = TTLCache()
+# Shared by every worker process on the host and kept across restarts
+disk_cache = DiskCache()
+# Concurrent identical searches in this process share one upstream call
+in_flight = SingleFlight()
+# Keeps each API key within its request budget and retries 429/5xx responses
+scheduler = RequestScheduler()
+# Full-text index over every article fetched, for local-first searches
+article_store = ArticleStore()
+
+
+# Function to build the NewsAPI query parameters
+def build_params(search_word, sort_by='relevancy', from_date=None, to_date=None, page_size=19, page=1, language=None, country=None, category=None, author=None, sources=None):
+    params = {"q": search_word, "sortBy": sort_by, "pageSize": page_size, "page": page}
+
+    if from_date and to_date:
+        params["from"] = from_date
+        params["to"] = to_date
+
+    if language:
+        params["language"] = language
+
+    if country:
+        params["country"] = country
+
+    if category:
+        params["category"] = category
+
+    if author:
+        params["author"] = author
+
+    if sources:
+        params["sources"] = sources
+
+    return params
+
+
+# Function to send one request to NewsAPI, moving on to the next pooled key if one is rejected
+def send_request(api_key, params, stream=False):
+    # Load the pool first, so the first request of a process can fail over too
+    refresh_keys()
+    attempts = max(len(key_pool), 1)
+
+    for attempt in range(attempts):
+        key = get_api_key()
+        if key is None:
+            if len(key_pool):
+                print(f"An error occurred while fetching news articles: every API key is cooling down, retry after {key_pool.cooldown():.0f} seconds")
+                return None
+            key = api_key
+        try:
+            response = scheduler.send(
+                key,
+                lambda: http_client.get(NEWS_API_URL, params=dict(params, apiKey=key), stream=stream),
+                retry_throttled=attempts == 1
+            )
+        except RateLimited as e:
+            key_pool.quarantine(key, e.retry_after)
+            print(f"An error occurred while fetching news articles: {e}")
+            continue
+
+        key_pool.report(key, response.status_code)
+        if response.status_code == 200:
+            return response
+        response.close()
+        if response.status_code not in (401, 429):
+            return None
+    return None
+
+
+# Function to send one request to NewsAPI and parse the whole response into Article records
+def request_news(api_key, params):
+    try:
+        response = send_request(api_key, params)
+        return parse_response(response.json()) if response is not None else None
+    except (requests.RequestException, ValueError) as e:
+        print(f"An error occurred while fetching news articles: {e}")
+        return None
+
+
+# Function to fetch news articles, served from the memory or disk cache when possible
+def get_news(api_key, search_word, sort_by='relevancy', from_date=None, to_date=None, page_size=19, page=1, language=None, country=None, category=None, author=None, sources=None, use_cache=True):
+    params = build_params(search_word, sort_by, from_date, to_date, page_size, page, language, country, category, author, sources)
+    cache_key = make_cache_key(params)
+
+    if use_cache:
+        data = response_cache.get(cache_key)
+        if data is not None:
+            return data
+
+    return in_flight.do((cache_key, use_cache, api_key), _load_news, api_key, params, cache_key, use_cache)
+
+
+# Function to load a response from the disk cache or NewsAPI and fill both caches
+def _load_news(api_key, params, cache_key, use_cache):
+    if use_cache:
+        data = disk_cache.get(cache_key)
+        if data is not None:
+            data = parse_response(data)
+            response_cache.set(cache_key, data)
+            return data
+
+    data = request_news(api_key, params)
+    if data is not None:
+        _store_news(params, cache_key, data)
+    return data
+
+
+# Function to put a response fetched from NewsAPI into both caches and the article store
+def _store_news(params, cache_key, data):
+    response_cache.set(cache_key, data)
+    disk_cache.set(cache_key, pack_response(data))
+    article_store.ingest(data['articles'], params_filters_key(params))
+
+
+# Function to stream articles one at a time instead of parsing the whole response at once
+def stream_news(api_key, search_word, sort_by='relevancy', from_date=None, to_date=None, page_size=19, page=1, language=None, country=None, category=None, author=None, sources=None):
+    params = build_params(search_word, sort_by, from_date, to_date, page_size, page, language, country, category, author, sources)
+    cache_key = make_cache_key(params)
+
+    data = response_cache.get(cache_key)
+    if data is None:
+        packed = disk_cache.get(cache_key)
+        if packed is not None:
+            data = parse_response(packed)
+            response_cache.set(cache_key, data)
+        elif in_flight.running((cache_key, True, api_key)):
+            # Another session is already fetching this search; wait for its result instead
+            data = get_news(api_key, search_word, sort_by, from_date, to_date, page_size, page, language, country, category, author, sources)
+            if data is None:
+                return None
+    if data is not None:
+        return ArticleStream.from_data(data)
+
+    try:
+        response = send_request(api_key, params, stream=True)
+    except requests.RequestException as e:
+        print(f"An error occurred while fetching news articles: {e}")
+        return None
+    if response is None:
+        return None
+    # Only a body read to the end is cached and stored
+    return ArticleStream.from_response(response, factory=Article.from_dict, on_complete=lambda data: _store_news(params, cache_key, data))
+
+
+# Function to fetch up to num_articles articles across several pages in parallel
+def get_news_pages(api_key, search_word, num_articles, sort_by='relevancy', from_date=None, to_date=None, language=None, country=None, category=None, author=None, sources=None, max_workers=PAGE_WORKERS):
+    page_size = min(num_articles, MAX_PAGE_SIZE)
+    first_page = get_news(api_key, search_word, sort_by, from_date, to_date, page_size, 1, language, country, category, author, sources)
+    if first_page is None:
+        return None
+
+    # Only ask for the pages that totalResults says actually exist
+    total_results = first_page.get('totalResults', 0)
+    page_count = min(math.ceil(num_articles / page_size), math.ceil(total_results / page_size))
+    pages = [first_page]
+
+    if page_count > 1:
+        with ThreadPoolExecutor(max_workers=min(max_workers, page_count - 1)) as executor:
+            pages += executor.map(
+                lambda page: get_news(api_key, search_word, sort_by, from_date, to_date, page_size, page, language, country, category, author, sources),
+                range(2, page_count + 1)
+            )
+
+    return {
+        'status': 'ok',
+        'totalResults': total_results,
+        'articles': merge_articles(pages, num_articles),
+    }
+
+
+# Function to merge pages in order, dropping articles already seen on an earlier page
+def merge_articles(pages, limit=None):
+    articles = []
+    seen = set()
+    for data in pages:
+        if not data:
+            continue
+        for article in data.get('articles', []):
+            key = article.url or (article.title, article.published_at)
+            if key in seen:
+                continue
+            seen.add(key)
+            articles.append(article)
+            if limit is not None and len(articles) >= limit:
+                return articles
+    return articles
+
+
+# Function to build the key under which the article store tracks a search's filters
+def filters_key(language=None, country=None, category=None, author=None, sources=None):
+    return json.dumps(make_cache_key({"language": language, "country": country, "category": category, "author": author, "sources": sources}))
+
+
+# Function to build the filters key of a set of NewsAPI query parameters
+def params_filters_key(params):
+    return filters_key(params.get("language"), params.get("country"), params.get("category"), params.get("author"), params.get("sources"))
+
+
+# Function to answer a search from the local article index, fetching only the dates it does not cover yet
+def get_news_local_first(api_key, search_word, num_articles, sort_by='relevancy', from_date=None, to_date=None, language=None, country=None, category=None, author=None, sources=None, offline=False):
+    keyword = normalize_keyword(search_word)
+    filters = filters_key(language, country, category, author, sources)
+    failed = False
+
+    if not offline:
+        for gap_from, gap_to in article_store.uncovered_ranges(keyword, filters, from_date, to_date):
+            data = get_news_pages(api_key, search_word, num_articles, sort_by, gap_from.isoformat(), gap_to.isoformat(), language, country, category, author, sources)
+            if data is None:
+                failed = True
+                continue
+            # Pages served from the response caches never went through _load_news
+            article_store.ingest(data['articles'], filters)
+            # A gap with more results than were fetched is not covered; the rest are only upstream
+            if data['totalResults'] <= num_articles:
+                article_store.add_coverage(keyword, filters, gap_from, gap_to)
+
+    articles = article_store.search(search_word, from_date, to_date, num_articles, filters, sort_by)
+    if failed and not articles:
+        return None
+    return {'status': 'ok', 'totalResults': len(articles), 'articles': articles}
+
+
+# Function to fetch only the articles published since the last poll of a watched search
+def poll_news(api_key, search_word, language=None, country=None, category=None, author=None, sources=None, since=None, max_articles=MAX_PAGE_SIZE):
+    """Returns the articles published after since (the newest ones when None), newest first.
+
+    Polls of the same keyword and filters share a watermark, the publishedAt
+    range already polled into the article store. When since falls inside it,
+    the articles up to the watermark come from the store and only newer ones
+    are requested. Pages are requested newest first, stopping at the first
+    article that is not new.
+    """
+    keyword = normalize_keyword(search_word)
+    filters = filters_key(language, country, category, author, sources)
+    watermark = article_store.watermark(keyword, filters)
+    stored = []
+    lower = since
+    if since is not None and watermark and watermark[0] <= since < watermark[1]:
+        stored = article_store.published_between(search_word, since, watermark[1], filters, max_articles)
+        lower = watermark[1]
+
+    # NewsAPI wants "from"/"to" without the trailing "Z"
+    from_date = lower[:19] if lower else None
+    to_date = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%S') if lower else None
+    page_size = min(max_articles, MAX_PAGE_SIZE)
+
+    articles = []
+    page = 1
+    complete = False
+    while len(articles) < max_articles:
+        data = request_news(api_key, build_params(search_word, 'publishedAt', from_date, to_date, page_size, page, language, country, category, author, sources))
+        if data is None:
+            if page == 1:
+                return None
+            break
+
+        new_articles = [article for article in data['articles'] if lower is None or (article.published_at or "") > lower]
+        articles.extend(new_articles)
+        if len(new_articles) < len(data['articles']) or page * page_size >= data.get('totalResults', 0):
+            complete = len(articles) <= max_articles
+            break
+        page += 1
+
+    articles = articles[:max_articles]
+    article_store.ingest(articles, filters)
+    published = [article.published_at for article in articles if article.published_at]
+    if published:
+        # Short of the lower bound, only the run of articles actually fetched is known to be gap-free
+        article_store.set_watermark(keyword, filters, (lower or "") if complete else min(published), max(published))
+
+    articles = (articles + stored)[:max_articles]
+    return {'status': 'ok', 'totalResults': len(articles), 'articles': articles, 'since': since}
+
+
+def get_cache_stats():
+    """Returns hit-rate statistics for the caches, request coalescer, scheduler and key pool."""
+    return {"memory": response_cache.stats(), "disk": disk_cache.stats(), "single_flight": in_flight.stats(), "scheduler": scheduler.stats(), "keys": key_pool.stats()}
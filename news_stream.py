@@ -0,0 +1,157 @@
+import codecs
+import json
+
+import requests
+
+# Bytes read from the response body per network read
+CHUNK_SIZE = 16 * 1024
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+
+
+class ArticleStream:
+    """Lazily parses a NewsAPI response body and yields one article at a time.
+
+    Only the article currently being decoded is held in memory, so rendering
+    can start before the whole payload has arrived. Top-level fields other
+    than 'articles' (status, totalResults, ...) are collected in meta as they
+    are parsed. A network or parse error ends the stream early.
+
+    If given, on_complete is called with the whole response (meta plus the
+    list of articles) once the body has been read to the end without errors.
+    """
+
+    def __init__(self, chunks, field='articles', factory=None, on_complete=None):
+        self.meta = {}
+        self._chunks = iter(chunks)
+        self._field = field
+        self._factory = factory
+        self._decode = codecs.getincrementaldecoder('utf-8')(errors='replace').decode
+        self._buffer = ""
+        self._pos = 0
+        self._exhausted = False
+        self._started = False
+        self._cached_articles = None
+        self._response = None
+        self._on_complete = on_complete
+        self._articles = [] if on_complete else None
+
+    @classmethod
+    def from_response(cls, response, chunk_size=CHUNK_SIZE, factory=None, on_complete=None):
+        """Streams the body of a requests response opened with stream=True.
+
+        If given, factory is applied to each decoded article dict.
+        """
+        stream = cls(response.iter_content(chunk_size=chunk_size), factory=factory, on_complete=on_complete)
+        stream._response = response
+        return stream
+
+    @classmethod
+    def from_data(cls, data):
+        """Wraps an already parsed response, e.g. one served from the cache."""
+        stream = cls(())
+        stream.meta = {k: v for k, v in data.items() if k != 'articles'}
+        stream._cached_articles = data.get('articles', [])
+        return stream
+
+    def __iter__(self):
+        if self._cached_articles is not None:
+            return iter(self._cached_articles)
+        if self._started:
+            raise RuntimeError("ArticleStream can only be iterated once")
+        self._started = True
+        return self._iterate()
+
+    def _iterate(self):
+        try:
+            for article in self._parse():
+                if self._articles is not None:
+                    self._articles.append(article)
+                yield article
+        except (requests.RequestException, ValueError) as e:
+            print(f"An error occurred while reading the news articles: {e}")
+            return
+        finally:
+            # Hand the connection back to the pool even if iteration stops early
+            if self._response is not None:
+                self._response.close()
+        if self._on_complete:
+            self._on_complete(dict(self.meta, articles=self._articles))
+
+    def _fill(self):
+        """Reads the next chunk into the buffer; returns False at end of body."""
+        if self._exhausted:
+            return False
+        for chunk in self._chunks:
+            if not chunk:
+                continue
+            # Drop everything already consumed before appending
+            self._buffer = self._buffer[self._pos:] + self._decode(chunk)
+            self._pos = 0
+            return True
+        self._buffer = self._buffer[self._pos:] + self._decode(b"", final=True)
+        self._pos = 0
+        self._exhausted = True
+        return False
+
+    def _skip_whitespace(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer) or not self._fill():
+                return
+
+    def _expect(self, chars):
+        """Consumes one of chars (after whitespace) and returns it."""
+        self._skip_whitespace()
+        if self._pos >= len(self._buffer):
+            raise ValueError("Unexpected end of NewsAPI response")
+        char = self._buffer[self._pos]
+        if char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in NewsAPI response, got {char!r}")
+        self._pos += 1
+        return char
+
+    def _value(self):
+        """Decodes the next complete JSON value, reading more chunks as needed."""
+        self._skip_whitespace()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number at the very end of the buffer may still be incomplete
+            if end == len(self._buffer) and self._fill():
+                continue
+            self._pos = end
+            return value
+
+    def _parse(self):
+        self._expect("{")
+        self._skip_whitespace()
+        if self._buffer[self._pos:self._pos + 1] == "}":
+            return
+        while True:
+            name = self._value()
+            self._expect(":")
+            if name == self._field:
+                yield from self._parse_array()
+            else:
+                self.meta[name] = self._value()
+            if self._expect(",}") == "}":
+                return
+
+    def _parse_array(self):
+        self._expect("[")
+        self._skip_whitespace()
+        if self._buffer[self._pos:self._pos + 1] == "]":
+            self._pos += 1
+            return
+        while True:
+            item = self._value()
+            yield self._factory(item) if self._factory else item
+            if self._expect(",]") == "]":
+                return
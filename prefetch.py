@@ -0,0 +1,158 @@
+import threading
+from collections import Counter
+from datetime import date, timedelta
+
+import news_api
+from api_key import key_pool
+from response_cache import normalize_keyword
+
+# Seconds between prefetch cycles (matches the memory cache TTL)
+PREFETCH_INTERVAL = 300
+# Number of most frequent searches kept warm
+TOP_QUERIES = 5
+# Most articles prefetched per search; one page, so the first screen renders from cache
+PREFETCH_ARTICLES = news_api.MAX_PAGE_SIZE
+# Search counts are multiplied by this every cycle (a half-life of about half an hour),
+# and searches whose count falls below MIN_COUNT are forgotten
+COUNT_DECAY = 0.9
+MIN_COUNT = 0.1
+
+# Filters tab presets: (sort_by, days back for from_date, days back for to_date)
+NEWS_PRESETS = {
+    "Recent News": ("publishedAt", 7, 0),
+    "Trending News": ("popularity", 2, 0),
+    "Breaking News": ("publishedAt", 0, 0),
+    # NewsAPI only sorts newest first, so "oldest" is the start of its one-month window
+    "Oldest News": ("relevancy", 30, 23),
+}
+
+_QUERY_FIELDS = ("search_word", "num_articles", "language", "country", "category", "author", "sources")
+
+
+def preset_search(name, today=None):
+    """Returns (sort_by, from_date, to_date) for a Filters tab preset, or None."""
+    preset = NEWS_PRESETS.get(name)
+    if preset is None:
+        return None
+    sort_by, from_days, to_days = preset
+    today = today or date.today()
+    return sort_by, today - timedelta(days=from_days), today - timedelta(days=to_days)
+
+
+class Prefetcher:
+    """Background thread that keeps the most frequent searches warm in the cache.
+
+    Every search is counted by keyword and filters, and the counts decay
+    every cycle, so searches nobody makes any more stop being prefetched.
+    Each cycle the top
+    searches are fetched once per preset through news_api.get_news_pages, so
+    memory and disk cache hits cost nothing and only expired entries go
+    upstream (through the usual key pool and rate limiter).
+    """
+
+    def __init__(self, interval=PREFETCH_INTERVAL, top_queries=TOP_QUERIES, num_articles=PREFETCH_ARTICLES, decay=COUNT_DECAY):
+        self.interval = interval
+        self.top_queries = top_queries
+        self.num_articles = num_articles
+        self.decay = decay
+        self._counts = Counter()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self.cycles = 0
+        self.fetched = 0
+        self.failed = 0
+
+    def record(self, search_word, num_articles, language=None, country=None, category=None, author=None, sources=None):
+        """Counts one search so the most frequent ones get prefetched."""
+        keyword = normalize_keyword(search_word)
+        if not keyword:
+            return
+        # The first page of get_news_pages has pageSize min(num_articles, 100); prefetch that same page
+        query = (keyword, min(num_articles, self.num_articles), language or None, country or None, category or None, author or None, sources or None)
+        with self._lock:
+            self._counts[query] += 1
+
+    def top(self):
+        """Returns the most frequent searches as dicts of get_news_pages arguments."""
+        with self._lock:
+            queries = [query for query, _ in self._counts.most_common(self.top_queries)]
+        return [dict(zip(_QUERY_FIELDS, query)) for query in queries]
+
+    def decay_counts(self):
+        """Ages every search count by one cycle, dropping the ones that fall below MIN_COUNT."""
+        with self._lock:
+            for query in list(self._counts):
+                self._counts[query] *= self.decay
+                if self._counts[query] < MIN_COUNT:
+                    del self._counts[query]
+
+    def run_once(self):
+        """Prefetches every preset for every top search; returns the number warmed."""
+        queries = self.top()
+        self.decay_counts()
+        # len() rather than get_api_key(), which would count as a use of a key
+        if not queries or not len(key_pool):
+            return 0
+
+        warmed = 0
+        for name in NEWS_PRESETS:
+            sort_by, from_date, to_date = preset_search(name)
+            for query in queries:
+                if self._stop.is_set():
+                    return warmed
+                try:
+                    data = news_api.get_news_pages(
+                        None, query['search_word'], query['num_articles'], sort_by,
+                        from_date.strftime('%Y-%m-%d'), to_date.strftime('%Y-%m-%d'),
+                        query['language'], query['country'], query['category'], query['author'], query['sources']
+                    )
+                except Exception as e:
+                    print(f"An error occurred while prefetching news articles: {e}")
+                    data = None
+                if data is None:
+                    self.failed += 1
+                else:
+                    warmed += 1
+        self.fetched += warmed
+        self.cycles += 1
+        return warmed
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.run_once()
+            self._wake.wait(self.interval)
+            self._wake.clear()
+
+    def start(self):
+        """Starts the background thread; safe to call on every Streamlit rerun."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="news-prefetcher", daemon=True)
+            self._thread.start()
+
+    def wake(self):
+        """Runs the next cycle now instead of waiting out the interval."""
+        self._wake.set()
+
+    def stop(self):
+        self._stop.set()
+        self._wake.set()
+
+    def stats(self):
+        with self._lock:
+            tracked = len(self._counts)
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "tracked_queries": tracked,
+            "cycles": self.cycles,
+            "fetched": self.fetched,
+            "failed": self.failed,
+        }
+
+
+# One prefetcher per process, shared by every session
+prefetcher = Prefetcher()
@@ -0,0 +1,45 @@
+import heapq
+
+# NewsAPI sortBy values and how the app shows them
+SORT_ORDERS = {
+    "relevancy": "Relevance",
+    "publishedAt": "Newest first",
+    "popularity": "Popularity",
+}
+# Orders that can be computed from the articles alone; the others only exist upstream
+LOCAL_SORT_ORDERS = ("publishedAt",)
+
+
+def published_key(article):
+    return article.published_at or ""
+
+
+def build_sort_index(articles, fetched_sort_by):
+    """Precomputes the article order for every sort that can be served without a refetch.
+
+    The order the articles were fetched in is kept as is; orders in
+    LOCAL_SORT_ORDERS are computed once here, so switching between them later
+    is a lookup instead of a sort.
+    """
+    index = {fetched_sort_by: tuple(range(len(articles)))}
+    if "publishedAt" not in index:
+        # sorted() is stable, so articles with the same timestamp keep their upstream rank
+        index["publishedAt"] = tuple(sorted(range(len(articles)), key=lambda i: published_key(articles[i]), reverse=True))
+    return index
+
+
+def _ranked(run, run_index):
+    for rank, article in enumerate(run):
+        yield rank, run_index, article
+
+
+def merge_ranked(runs, sort_by="relevancy"):
+    """K-way merges article lists that are each already in sort_by order.
+
+    Newest-first runs are merged on publishedAt. Relevance and popularity
+    scores are not returned by NewsAPI, so those runs are merged on each
+    article's rank within its own run, which takes the best of every run first.
+    """
+    if sort_by == "publishedAt":
+        return heapq.merge(*runs, key=published_key, reverse=True)
+    return (article for _, _, article in heapq.merge(*(_ranked(run, i) for i, run in enumerate(runs))))
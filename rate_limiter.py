@@ -0,0 +1,192 @@
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+
+# Default request budget per API key: RATE tokens per second, bursts up to CAPACITY
+DEFAULT_RATE = 2.0
+DEFAULT_CAPACITY = 10
+# Retry policy for 429 and 5xx responses
+MAX_RETRIES = 3
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_MAX = 30.0  # seconds
+# Requests that would have to queue longer than this fail fast instead
+MAX_QUEUE_WAIT = 60.0  # seconds
+
+
+class RateLimited(Exception):
+    """Raised when a request would have to wait longer than MAX_QUEUE_WAIT."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Rate limited, retry after {retry_after:.0f} seconds")
+        self.retry_after = retry_after
+
+
+class TokenBucket:
+    """Reservation-based token bucket.
+
+    Callers that arrive when the bucket is empty reserve the next token and
+    sleep until it is available, so over-budget requests queue up in arrival
+    order instead of failing.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_CAPACITY):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self, max_wait=None):
+        """Takes one token and returns how many seconds to wait before using it.
+
+        If the wait would be longer than max_wait, raises RateLimited without
+        taking the token.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            tokens = self._tokens - 1
+            wait = max(-tokens / self.rate if tokens < 0 else 0.0, self._paused_until - now)
+            if max_wait is not None and wait > max_wait:
+                raise RateLimited(wait)
+            self._tokens = tokens
+            return wait
+
+    def pause(self, seconds):
+        """Stops handing out usable tokens for the given number of seconds."""
+        with self._lock:
+            self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def parse_retry_after(value):
+    """Returns the Retry-After header as seconds, or None if missing or invalid."""
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max((retry_at - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_MAX):
+    """Full-jitter exponential backoff for the given retry attempt (0-based)."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class RequestScheduler:
+    """Throttles upstream requests with one token bucket per API key.
+
+    429 responses pause the key's bucket for the Retry-After period (or a
+    backoff delay) and are retried; 5xx responses are retried with jittered
+    exponential backoff. Any other response is returned as is.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, capacity=DEFAULT_CAPACITY, max_retries=MAX_RETRIES, max_queue_wait=MAX_QUEUE_WAIT):
+        self.rate = rate
+        self.capacity = capacity
+        self.max_retries = max_retries
+        self.max_queue_wait = max_queue_wait
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self.queue_depth = 0
+        self.max_queue_depth = 0
+        self.requests = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.throttled = 0
+        self.server_errors = 0
+        self.retries = 0
+
+    def get_bucket(self, api_key):
+        with self._lock:
+            bucket = self._buckets.get(api_key)
+            if bucket is None:
+                bucket = self._buckets[api_key] = TokenBucket(self.rate, self.capacity)
+            return bucket
+
+    def configure(self, api_key, rate=None, capacity=None):
+        """Overrides the budget for a single API key."""
+        bucket = self.get_bucket(api_key)
+        with bucket._lock:
+            if rate is not None:
+                bucket.rate = rate
+            if capacity is not None:
+                bucket.capacity = capacity
+
+    def _wait_for_token(self, bucket):
+        wait = bucket.reserve(self.max_queue_wait)
+        with self._lock:
+            self.requests += 1
+            if wait > 0:
+                self.queued += 1
+                self.queue_depth += 1
+                self.max_queue_depth = max(self.max_queue_depth, self.queue_depth)
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        if wait > 0:
+            try:
+                time.sleep(wait)
+            finally:
+                with self._lock:
+                    self.queue_depth -= 1
+
+    def send(self, api_key, send_request, retry_throttled=True):
+        """Calls send_request() within the key's budget, retrying 429 and 5xx responses.
+
+        With retry_throttled=False a 429 is returned straight away, so the
+        caller can move on to another key. Raises RateLimited if the key's
+        queue is longer than max_queue_wait.
+        """
+        bucket = self.get_bucket(api_key)
+        attempt = 0
+        while True:
+            self._wait_for_token(bucket)
+            response = send_request()
+
+            if response.status_code == 429:
+                with self._lock:
+                    self.throttled += 1
+                delay = parse_retry_after(response.headers.get("Retry-After"))
+                bucket.pause(backoff_delay(attempt) if delay is None else delay)
+                if not retry_throttled or (delay is not None and delay > self.max_queue_wait):
+                    return response
+            elif response.status_code >= 500:
+                with self._lock:
+                    self.server_errors += 1
+                if attempt < self.max_retries:
+                    time.sleep(backoff_delay(attempt))
+            else:
+                return response
+
+            if attempt >= self.max_retries:
+                return response
+            attempt += 1
+            with self._lock:
+                self.retries += 1
+
+    def stats(self):
+        """Returns queue depth and wait-time metrics."""
+        with self._lock:
+            return {
+                "queue_depth": self.queue_depth,
+                "max_queue_depth": self.max_queue_depth,
+                "requests": self.requests,
+                "queued": self.queued,
+                "avg_wait": self.total_wait / self.requests if self.requests else 0.0,
+                "max_wait": self.max_wait,
+                "throttled": self.throttled,
+                "server_errors": self.server_errors,
+                "retries": self.retries,
+            }
@@ -0,0 +1,94 @@
+import os
+import threading
+import zlib
+
+# Names invalidated one at a time share this many version files, so other
+# processes only drop the entries that hash to the same file
+VERSION_BUCKETS = 64
+# Version file for invalidations of every name, next to the bucket files
+ALL_VERSION = "all"
+
+
+class ReadThroughCache:
+    """Process-local cache for small, rarely written database reads.
+
+    Writers call invalidate(), which clears this process's values and
+    replaces a version file in version_dir. Every get() compares that file's
+    (inode, mtime) with the last one seen, so other worker processes notice
+    the write with a single os.stat instead of a query per rerun.
+
+    invalidate(name) drops a single entry instead: it replaces the version
+    file of the name's bucket, and each entry remembers the bucket version it
+    was loaded under, so other processes only reload the entries in that bucket.
+    """
+
+    def __init__(self, version_dir):
+        self.version_dir = version_dir
+        self.version_path = os.path.join(version_dir, ALL_VERSION)
+        self._values = {}
+        self._seen = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _bucket_path(self, name):
+        # crc32 of the repr rather than hash(), which differs between processes
+        return os.path.join(self.version_dir, str(zlib.crc32(repr(name).encode()) % VERSION_BUCKETS))
+
+    def _version(self, path):
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def get(self, name, loader):
+        """Returns the cached value for name, calling loader() on a miss.
+
+        If loader raises, nothing is cached and the exception propagates.
+        """
+        version = self._version(self.version_path)
+        bucket_version = self._version(self._bucket_path(name))
+        with self._lock:
+            if version != self._seen:
+                self._values.clear()
+                self._seen = version
+            entry = self._values.get(name)
+            if entry is not None and entry[1] == bucket_version:
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        value = loader()
+        with self._lock:
+            # A write that landed while loading changed the version; leave it for the next get()
+            if self._seen == version:
+                self._values[name] = (value, bucket_version)
+        return value
+
+    def invalidate(self, *names):
+        """Drops the given cached values (every value if none are given) here and in the other processes."""
+        with self._lock:
+            if not names:
+                self._values.clear()
+            for name in names:
+                self._values.pop(name, None)
+        paths = {self._bucket_path(name) for name in names} if names else {self.version_path}
+        for path in paths:
+            self._replace_version(path)
+
+    def _replace_version(self, path):
+        # A new file each time, so the inode changes even within one mtime tick
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.version_dir, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                f.write("")
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"An error occurred while updating the cache version: {e}")
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._values), "hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0}
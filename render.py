@@ -0,0 +1,47 @@
+import html
+import itertools
+
+# Articles per st.markdown call, and per "Load more" click
+RENDER_CHUNK_SIZE = 20
+
+# Fields shown for each output format, in display order
+OUTPUT_FIELDS = {
+    "Title and Description": ("title", "description"),
+    "Title Only": ("title",),
+    "Description Only": ("description",),
+    "Content Only": ("title", "content"),
+    "Title, Description and Content": ("title", "description", "content"),
+}
+
+
+def _text(value):
+    return html.escape(value) if value else ""
+
+
+def format_article(article, output_format, show_date=False):
+    """Returns the HTML for one article in the selected output format."""
+    parts = ['<div class="news-article">']
+    for field in OUTPUT_FIELDS.get(output_format, ()):
+        if field == "title":
+            parts.append(f"<h3>{_text(article.title)}</h3>")
+        else:
+            parts.append(f"<p>{_text(getattr(article, field))}</p>")
+    if show_date:
+        parts.append(f"<p>Published: {_text(article.published_at)}</p>")
+    parts.append("<hr></div>")
+    return "".join(parts)
+
+
+def format_articles(articles, output_format, show_date=False):
+    """Returns one HTML block for a batch of articles, sent as a single delta."""
+    return "".join(format_article(article, output_format, show_date) for article in articles)
+
+
+def iter_chunks(articles, chunk_size=RENDER_CHUNK_SIZE):
+    """Yields lists of up to chunk_size articles; works on lazy iterators too."""
+    iterator = iter(articles)
+    while True:
+        chunk = list(itertools.islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Default bounds for the in-process response cache
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_TTL = 300  # seconds
+
+
+def normalize_keyword(search_word):
+    """Collapses whitespace and case so equivalent keywords share a cache entry."""
+    return " ".join((search_word or "").split()).lower()
+
+
+def make_cache_key(params):
+    """Builds a canonical, hashable key from NewsAPI request parameters.
+
+    Empty parameters are dropped, the keyword is normalized and comma-separated
+    lists (such as sources) are sorted, so parameter order does not matter.
+    """
+    items = []
+    for name, value in params.items():
+        if value is None or value == "":
+            continue
+        if name == "q":
+            value = normalize_keyword(value)
+        elif isinstance(value, (list, tuple, set)):
+            value = ",".join(sorted(str(v).strip() for v in value if v))
+        elif isinstance(value, str) and "," in value:
+            value = ",".join(sorted(v.strip() for v in value.split(",") if v.strip()))
+        else:
+            value = str(value).strip()
+        items.append((name, value))
+    return tuple(sorted(items))
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries also expire after a fixed TTL."""
+
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key):
+        """Returns the cached value for key, or None if missing or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Stores value under key, evicting the least recently used entries."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, key):
+        """Removes a single entry from the cache."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        """Removes every entry and resets the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = self.expirations = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Returns hit/miss counters and the current hit rate."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
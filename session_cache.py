@@ -0,0 +1,97 @@
+import itertools
+import time
+from collections import OrderedDict
+from ranking import build_sort_index
+from response_cache import make_cache_key
+
+# Number of result sets each session keeps in memory
+MAX_RESULT_SETS = 5
+# Seconds a stored result set may answer a repeated Search click
+RESULTS_MAX_AGE = 900
+
+
+def make_results_key(search, num_articles, per_source=False, local_first=False):
+    """Builds a canonical key for a search from its query parameters and filters."""
+    params = {k: v for k, v in search.items() if k != 'search_word'}
+    params.update(q=search['search_word'], num_articles=num_articles, per_source=per_source or None, local_first=local_first or None)
+    return make_cache_key(params)
+
+
+def make_results_label(search):
+    """Builds the label shown for a result set: the keyword followed by a summary of its filters."""
+    filters = [search.get(name) for name in ('language', 'country', 'category', 'author', 'sources') if search.get(name)]
+    if search.get('from_date') and search.get('to_date'):
+        filters.append(f"{search['from_date']} to {search['to_date']}")
+    if search.get('sort_by', 'relevancy') != 'relevancy':
+        filters.append(f"by {search['sort_by']}")
+    return f"{search['search_word']} ({', '.join(filters)})" if filters else search['search_word']
+
+
+class ResultSets:
+    """The last few result sets of one session, keyed by query and filters.
+
+    Articles are kept as a tuple of Article records, so switching output
+    format, toggling the published date or going back to an earlier search
+    re-renders from memory without touching the network. Each set also keeps
+    a precomputed index per locally available sort order, and a version that
+    changes whenever it is stored again.
+    """
+
+    def __init__(self, max_entries=MAX_RESULT_SETS, max_age=RESULTS_MAX_AGE):
+        self.max_entries = max_entries
+        self.max_age = max_age
+        self._entries = OrderedDict()
+        self._versions = itertools.count(1)
+
+    def get(self, key):
+        """Returns the result set stored under key, or None."""
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    def put(self, key, label, articles, search, num_articles, per_source=False, local_first=False):
+        """Stores a result set, dropping the least recently used one if full.
+
+        num_articles, per_source and local_first record how the set was
+        fetched, so it can be fetched again the same way in another order.
+        """
+        articles = tuple(articles)
+        self._entries[key] = {
+            'label': label, 'articles': articles, 'search': search, 'fetched_at': time.monotonic(), 'version': next(self._versions),
+            'num_articles': num_articles, 'per_source': per_source, 'local_first': local_first,
+            'sort_index': build_sort_index(articles, search.get('sort_by', 'relevancy')),
+        }
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def sorted_articles(self, key, sort_by):
+        """Returns the articles of a result set in sort_by order, or None if that needs a refetch."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        order = entry['sort_index'].get(sort_by)
+        if order is None:
+            return None
+        articles = entry['articles']
+        return tuple(articles[i] for i in order)
+
+    def is_fresh(self, key):
+        """Returns True if key is stored and young enough to reuse instead of refetching."""
+        entry = self._entries.get(key)
+        return entry is not None and time.monotonic() - entry['fetched_at'] < self.max_age
+
+    def recent(self):
+        """Returns the stored keys, most recently used first."""
+        return list(reversed(self._entries))
+
+    def label(self, key):
+        entry = self._entries.get(key)
+        return entry['label'] if entry else ""
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -1,25 +1,20 @@
 import streamlit as st
-import requests
-import json
+import news_api
+import async_news
+import render
+import dedupe
+import ranking
+from export import ExportCache
+from session_cache import ResultSets, make_results_key, make_results_label
+import bulk_export
+import os
+from api_key import reload_keys
 from datetime import datetime, timedelta
-import sqlite3
 import secrets
-from database import create_table, save_api_key, load_api_key
-from news_sources import NEWS_SOURCES
-from countries import COUNTRIES
-from categories import CATEGORIES
-from authors import AUTHORS
+from database import save_api_key, load_api_key, add_api_key, load_api_keys, save_user_preferences, load_user_preferences
+from catalog import SOURCES, COUNTRY_CATALOG, CATEGORY_CATALOG, AUTHOR_CATALOG
 import user_database
 
-# Database setup
-DATABASE_PATH = "news_app.db"  # Path to your SQLite database file
-conn = sqlite3.connect(DATABASE_PATH)
-cursor = conn.cursor()
-
-# Initialize database and create tables
-create_table()
-user_database.create_table()
-
 # Set the page title and layout
 st.set_page_config(page_title="Next News Search", layout="wide")
 
@@ -34,35 +29,80 @@ LANGUAGES = {
     "ar": "Arabic"
 }
 
+# Output formats offered in the Filters tab
+OUTPUT_FORMATS = [
+    "Title and Description",
+    "Title Only",
+    "Description Only",
+    "Content Only",
+    "Title, Description and Content"
+]
+
 # Function to fetch news articles
 def fetch_news(api_key, search_word, sort_by='relevancy', from_date=None, to_date=None, page_size=19, page=1, language=None, country=None, category=None, author=None, sources=None):
-    url = f"https://newsapi.org/v2/everything?q={search_word}&apiKey={api_key}&sortBy={sort_by}&pageSize={page_size}&page={page}"
-    
-    if from_date and to_date:
-        url += f"&from={from_date}&to={to_date}"
-    
-    if language:
-        url += f"&language={language}"
-    
-    if country:
-        url += f"&country={country}"
-    
-    if category:
-        url += f"&category={category}"
-    
-    if author:
-        url += f"&author={author}"
-    
-    if sources:
-        url += f"&sources={sources}"
-    
-    response = requests.get(url)
-    
-    if response.status_code == 200:
-        return json.loads(response.text)
-    else:
+    data = news_api.get_news(api_key, search_word, sort_by, from_date, to_date, page_size, page, language, country, category, author, sources)
+
+    if data is None:
+        st.error("Failed to fetch news articles. Please check your API key and try again.")
+    return data
+
+# Function to fetch more than one page of news articles in parallel
+def fetch_news_pages(api_key, search_word, num_articles, sort_by='relevancy', from_date=None, to_date=None, language=None, country=None, category=None, author=None, sources=None):
+    data = news_api.get_news_pages(api_key, search_word, num_articles, sort_by, from_date, to_date, language, country, category, author, sources)
+
+    if data is None:
+        st.error("Failed to fetch news articles. Please check your API key and try again.")
+    return data
+
+# Function to stream news articles so rendering can start before the response has fully arrived
+def fetch_news_stream(api_key, search_word, sort_by='relevancy', from_date=None, to_date=None, page_size=19, page=1, language=None, country=None, category=None, author=None, sources=None):
+    stream = news_api.stream_news(api_key, search_word, sort_by, from_date, to_date, page_size, page, language, country, category, author, sources)
+
+    if stream is None:
+        st.error("Failed to fetch news articles. Please check your API key and try again.")
+    return stream
+
+# Function to search the local article index first and fetch only the dates it does not cover
+def fetch_news_local_first(api_key, search_word, num_articles, sort_by='relevancy', from_date=None, to_date=None, language=None, country=None, category=None, author=None, sources=None):
+    data = news_api.get_news_local_first(api_key, search_word, num_articles, sort_by, from_date, to_date, language, country, category, author, sources)
+
+    if data is None:
+        st.error("Failed to fetch news articles. Please check your API key and try again.")
+    return data
+
+# Function to fetch news articles with one concurrent request per selected source
+def fetch_news_per_source(api_key, search_word, num_articles, sources, sort_by='relevancy', from_date=None, to_date=None, language=None, country=None, category=None, author=None):
+    data = async_news.fetch_news_fanout(
+        api_key, search_word, sources=sources, countries=[country], categories=[category], limit=num_articles,
+        sort_by=sort_by, from_date=from_date, to_date=to_date, page_size=min(num_articles, news_api.MAX_PAGE_SIZE),
+        language=language, author=author
+    )
+
+    if data is None:
         st.error("Failed to fetch news articles. Please check your API key and try again.")
-        return None
+    elif data['failed']:
+        st.warning(f"Could not fetch results from: {', '.join(c[0] or 'all sources' for c in data['failed'])}")
+    return data
+
+# Function to fetch a search the way it was asked for: local-first, one request per source, or page by page
+def fetch_results(api_key, search, num_articles, per_source=False, local_first=False):
+    sources = search['sources'].split(",") if search['sources'] else []
+    if local_first:
+        return fetch_news_local_first(api_key, search['search_word'], num_articles, search['sort_by'], search['from_date'], search['to_date'], search['language'], search['country'], search['category'], search['author'], search['sources'])
+    if per_source and len(sources) > 1:
+        return fetch_news_per_source(api_key, search['search_word'], num_articles, sources, search['sort_by'], search['from_date'], search['to_date'], search['language'], search['country'], search['category'], search['author'])
+    return fetch_news_pages(api_key, search['search_word'], num_articles, search['sort_by'], search['from_date'], search['to_date'], search['language'], search['country'], search['category'], search['author'], search['sources'])
+
+# Function to fetch only the articles published since the last check of a search
+def fetch_new_articles(api_key, search, since=None):
+    data = news_api.poll_news(api_key, search['search_word'], search['language'], search['country'], search['category'], search['author'], search['sources'], since)
+
+    if data is None:
+        st.error("Failed to fetch news articles. Please check your API key and try again.")
+    return data
+
+# Flush session activity and sweep expired sessions in the background
+user_database.start_session_worker()
 
 # User Authentication with SQLite Database (using cookies)
 def user_authentication():
@@ -75,23 +115,21 @@ def user_authentication():
     # Check if the user is logged in (based on session ID)
     if 'username' in st.session_state:
         username = st.session_state['username']
-        # Check if the session ID matches in the database
-        user = user_database.get_user_by_session_id(st.session_state['session_id'])
-        if user and user[0] == username:
+        # Look up the session's user and last activity in one query
+        session = user_database.get_session(st.session_state['session_id'])
+        if session and session[0] == username:
             # Check if the session is still active
-            last_activity = user_database.get_last_activity(st.session_state['session_id'])
+            last_activity = session[1]
             if last_activity:
                 # Calculate time since last activity
                 time_elapsed = datetime.now() - last_activity
-                # Set session timeout to 30 days
-                session_timeout = timedelta(days=30)  
-                if time_elapsed > session_timeout:
+                if time_elapsed > user_database.SESSION_TIMEOUT:
                     st.session_state['is_logged_in'] = False
                     st.session_state['username'] = ''
                     st.sidebar.write("Session expired. Please log in again.")
                 else:
-                    # Update last activity timestamp
-                    user_database.save_last_activity(st.session_state['session_id'])
+                    # Update last activity timestamp (buffered and written by the session worker)
+                    user_database.touch_session(st.session_state['session_id'])
                     st.session_state['is_logged_in'] = True
                     st.sidebar.write(f"Logged in as: {username}")
                     if st.sidebar.button("Logout"):
@@ -157,6 +195,7 @@ if not api_key:
     if st.button("Save API Key", key="save_api_key_button"):
         if new_api_key:
             save_api_key(new_api_key)
+            reload_keys()
             st.success("API Key saved successfully!")
             api_key = new_api_key  # Update the local variable
         else:
@@ -176,13 +215,86 @@ if "filters" not in st.session_state:
         "from_date": datetime.now() - timedelta(days=30),
         "to_date": datetime.now(),
         "num_articles": 19,
+        "per_source": False,
+        "stream_results": False,
+        "local_first": False,
+        "near_duplicates": True,
+        "sort_by": "relevancy",
         "output_format": "Title and Description"  # Default output format
     }
 
+# Load the logged-in user's saved preferences into the Filters tab once per login
+if authentication_status and st.session_state.get('preferences_user') != st.session_state['username']:
+    st.session_state.preferences_user = st.session_state['username']
+    preferences = load_user_preferences(st.session_state['username'])
+    if preferences['language'] in LANGUAGES:
+        st.session_state.language_select = st.session_state.filters['language'] = preferences['language']
+    st.session_state.source_select = st.session_state.filters['sources'] = [source for source in preferences['sources'] if source in SOURCES]
+    if preferences['output_format'] in OUTPUT_FORMATS:
+        st.session_state.output_format_select = st.session_state.filters['output_format'] = preferences['output_format']
+
 # Initialize session state for "show_date" if not already done
 if "show_date" not in st.session_state:
     st.session_state.show_date = False
 
+# Initialize session state for the recent search results if not already done
+if "result_sets" not in st.session_state:
+    st.session_state.result_sets = ResultSets()
+    st.session_state.results_key = None
+    st.session_state.visible_articles = render.RENDER_CHUNK_SIZE
+    st.session_state.export_cache = ExportCache()
+
+# Function to show the next chunk of search results
+def show_more_articles():
+    st.session_state.visible_articles += render.RENDER_CHUNK_SIZE
+
+# Function to switch back to an earlier result set
+def show_result_set():
+    st.session_state.results_key = st.session_state.recent_search_select
+    st.session_state.visible_articles = render.RENDER_CHUNK_SIZE
+    st.session_state.results_sort_select = st.session_state.result_sets.get(st.session_state.results_key)['search']['sort_by']
+
+# Function to re-rank the current results, going upstream only for orders that cannot be computed locally
+def change_sort(api_key):
+    sort_by = st.session_state.results_sort_select
+    st.session_state.visible_articles = render.RENDER_CHUNK_SIZE
+    result_set = st.session_state.result_sets.get(st.session_state.results_key)
+    if not result_set or st.session_state.result_sets.sorted_articles(st.session_state.results_key, sort_by) is not None:
+        return
+
+    # Fetch the set again in the new order, the same way it was fetched; pages already in the response caches are not refetched
+    search = dict(result_set['search'], sort_by=sort_by)
+    num_articles, per_source, local_first = result_set['num_articles'], result_set['per_source'], result_set['local_first']
+    results_key = make_results_key(search, num_articles, per_source, local_first)
+    if not st.session_state.result_sets.is_fresh(results_key):
+        data = fetch_results(api_key, search, num_articles, per_source, local_first)
+        if data is None:
+            st.session_state.results_sort_select = result_set['search']['sort_by']
+            return
+        st.session_state.result_sets.put(results_key, make_results_label(search), dedupe.unique_articles(data['articles'], st.session_state.filters.get('near_duplicates', True)), search, num_articles, per_source, local_first)
+    st.session_state.results_key = results_key
+
+# Function to merge the articles published since the last check into the current result set
+def check_new_articles(api_key):
+    results_key = st.session_state.results_key
+    result_set = st.session_state.result_sets.get(results_key)
+    if not result_set:
+        return
+
+    articles = result_set['articles']
+    newest = max((article.published_at for article in articles if article.published_at), default=None)
+    data = fetch_new_articles(api_key, result_set['search'], newest)
+    if data is None:
+        return
+
+    merged = tuple(dedupe.unique_articles(list(data['articles']) + list(articles), st.session_state.filters.get('near_duplicates', True)))
+    # Duplicates of articles already shown may replace them in merged, so count by canonical URL
+    known = {dedupe.canonicalize_url(article.url) for article in articles}
+    st.session_state.new_articles = sum(1 for article in merged if dedupe.canonicalize_url(article.url) not in known)
+    if st.session_state.new_articles:
+        st.session_state.result_sets.put(results_key, result_set['label'], merged, result_set['search'], result_set['num_articles'], result_set['per_source'], result_set['local_first'])
+        st.session_state.export_cache.invalidate(results_key)
+
 # Check if user is logged in
 if not authentication_status:
     st.warning("Please log in to access the application.")
@@ -207,55 +319,126 @@ else:
                     from_date = st.session_state.filters['from_date']
                     to_date = st.session_state.filters['to_date']
                     num_articles = st.session_state.filters['num_articles']
+                    sort_by = st.session_state.filters.get('sort_by', 'relevancy')
 
                     # Convert dates to string format
                     from_date_str = from_date.strftime('%Y-%m-%d') if from_date else None
                     to_date_str = to_date.strftime('%Y-%m-%d') if to_date else None
 
-                    # Fetch articles
-                    sources_str = ",".join(sources) if sources else None
-                    data = fetch_news(api_key, search_word, 'relevancy', from_date_str, to_date_str, num_articles, 1, language, country, category, author, sources_str)
+                    search = {
+                        'search_word': search_word, 'sort_by': sort_by, 'from_date': from_date_str, 'to_date': to_date_str,
+                        'language': language, 'country': country, 'category': category, 'author': author,
+                        'sources': ",".join(sources) if sources else None,
+                    }
+                    per_source = st.session_state.filters.get('per_source', False)
+                    local_first = st.session_state.filters.get('local_first', False)
+                    results_key = make_results_key(search, num_articles, per_source, local_first)
+
+                    # Fetch articles, unless this session already has results for the same query and filters
+                    if st.session_state.result_sets.is_fresh(results_key):
+                        data = {'articles': st.session_state.result_sets.get(results_key)['articles']}
+                    elif st.session_state.filters.get('stream_results') and num_articles <= news_api.MAX_PAGE_SIZE and not per_source and not local_first:
+                        stream = fetch_news_stream(api_key, search_word, sort_by, from_date_str, to_date_str, num_articles, 1, language, country, category, author, search['sources'])
+                        data = {'articles': stream} if stream is not None else None
+                    else:
+                        data = fetch_results(api_key, search, num_articles, per_source, local_first)
 
                     # Check if data is not None and contains 'articles'
                     if data and 'articles' in data:
-                        articles = data['articles']
-                        results = ""
-
-                        for article in articles:
-                            if st.session_state.filters['output_format'] == "Title and Description":
-                                st.subheader(article['title'])
-                                st.write(article['description'])
-                                results += f"**{article['title']}**\n{article['description']}\n\n"
-                            elif st.session_state.filters['output_format'] == "Title Only":
-                                st.subheader(article['title'])
-                                results += f"**{article['title']}**\n\n"
-                            elif st.session_state.filters['output_format'] == "Description Only":
-                                st.write(article['description'])
-                                results += f"{article['description']}\n\n"
-                            elif st.session_state.filters['output_format'] == "Content Only":
-                                st.subheader(article['title'])
-                                st.write(article['content'])
-                                results += f"**{article['title']}**\n{article['content']}\n\n"
-                            elif st.session_state.filters['output_format'] == "Title, Description and Content":
-                                st.subheader(article['title'])
-                                st.write(article['description'])
-                                st.write(article['content'])
-                                results += f"**{article['title']}**\n{article['description']}\n{article['content']}\n\n"
-
-                            if st.session_state.show_date:
-                                st.write(f"Published: {article['publishedAt']}")
-
-                            st.write("-" * 20)
-
-                        # Show results in an expander
-                        with st.expander("Save Results", expanded=False):
-                            st.text_area("Copy Results", value=results, height=300)
+                        articles = []
+                        first_chunk = st.empty()
+                        deduplicator = dedupe.Deduplicator(near_duplicates=st.session_state.filters.get('near_duplicates', True))
+
+                        # Show the first chunk as soon as it arrives; streamed results are still being parsed
+                        for chunk in render.iter_chunks(deduplicator.filter(data['articles'])):
+                            if not articles:
+                                first_chunk.markdown(render.format_articles(chunk, st.session_state.filters['output_format'], st.session_state.show_date), unsafe_allow_html=True)
+                            articles.extend(chunk)
+
+                        first_chunk.empty()
+                        if deduplicator.removed:
+                            st.caption(f"Removed {deduplicator.removed} duplicate articles.")
+                        if not st.session_state.result_sets.is_fresh(results_key):
+                            st.session_state.result_sets.put(results_key, make_results_label(search), articles, search, num_articles, per_source, local_first)
+                        st.session_state.results_key = results_key
+                        st.session_state.visible_articles = render.RENDER_CHUNK_SIZE
+                        st.session_state.results_sort_select = sort_by
 
                     else:
+                        st.session_state.results_key = None
                         st.warning("No articles found for your search query or an error occurred.")
             else:
                 st.warning("Please enter both your API key and search keywords.")
 
+        # Let the user go back to one of the recent result sets without another API call
+        if len(st.session_state.result_sets) > 1 and st.session_state.results_key in st.session_state.result_sets:
+            recent_keys = st.session_state.result_sets.recent()
+            st.selectbox(
+                "Recent searches:",
+                options=recent_keys,
+                index=recent_keys.index(st.session_state.results_key),
+                format_func=st.session_state.result_sets.label,
+                key="recent_search_select",
+                on_change=show_result_set
+            )
+
+        # Render the current results one chunk per st.markdown call, with "Load more" for the rest
+        result_set = st.session_state.result_sets.get(st.session_state.results_key) if st.session_state.results_key else None
+        if result_set:
+            # Re-rank locally with the precomputed sort index when the order allows it
+            sort_by = st.selectbox(
+                "Sort results by:",
+                options=list(ranking.SORT_ORDERS.keys()),
+                format_func=ranking.SORT_ORDERS.get,
+                key="results_sort_select",
+                on_change=change_sort,
+                args=(api_key,)
+            )
+            articles = st.session_state.result_sets.sorted_articles(st.session_state.results_key, sort_by) or result_set['articles']
+            visible_articles = st.session_state.visible_articles
+
+            for chunk in render.iter_chunks(articles[:visible_articles]):
+                st.markdown(render.format_articles(chunk, st.session_state.filters['output_format'], st.session_state.show_date), unsafe_allow_html=True)
+
+            if visible_articles < len(articles):
+                st.button(f"Load more ({len(articles) - visible_articles} remaining)", key="load_more_button", on_click=show_more_articles)
+
+            # Watched search: only ask NewsAPI for what was published after the newest article shown
+            st.button("Check for new articles", key="check_new_button", on_click=check_new_articles, args=(api_key,))
+            if "new_articles" in st.session_state:
+                st.caption(f"{st.session_state.pop('new_articles')} new articles added.")
+
+            # Show results in an expander; the export text is only built once it is asked for
+            with st.expander("Save Results", expanded=False):
+                if st.checkbox("Show results as text", key="show_results_text"):
+                    results = st.session_state.export_cache.get_text(st.session_state.results_key, result_set['version'], articles, st.session_state.filters['output_format'], sort_by)
+                    st.text_area("Copy Results", value=results, height=300)
+
+                # Export every page of the last search straight to a file on the server
+                st.write("Export all pages to a file:")
+                export_format = st.selectbox("File format:", list(bulk_export.EXPORT_FORMATS.keys()), key="export_format_select")
+                export_limit = st.number_input("Maximum number of articles:", min_value=1, max_value=10000, value=1000, key="export_limit_input")
+                export_compressed = st.checkbox("Compress file", value=False, key="export_compress_checkbox")
+
+                if st.button("Export", key="export_button"):
+                    last_search = result_set['search']
+                    extension = bulk_export.EXPORT_FORMATS[export_format]
+                    compression = "gzip" if export_compressed else None
+                    path = bulk_export.export_path(last_search['search_word'], extension, compression)
+                    columns = bulk_export.export_columns(st.session_state.filters['output_format'], st.session_state.show_date)
+
+                    with st.spinner("Exporting news articles..."):
+                        try:
+                            rows = bulk_export.export_articles(bulk_export.iter_articles(api_key, max_articles=export_limit, near_duplicates=st.session_state.filters.get('near_duplicates', True), **last_search), path, extension, columns, compression)
+                        except ImportError as e:
+                            st.error(str(e))
+                            rows = None
+
+                    if rows is not None:
+                        st.success(f"Exported {rows} articles.")
+                        # The file is removed from the server once its contents are handed to the download button
+                        st.download_button("Download Export", data=bulk_export.take_export(path), file_name=os.path.basename(path), key="export_download_button")
+
     # Filters Tab
     with tabs[1]:
         st.header("Filter News")
@@ -270,47 +453,50 @@ else:
 
         st.session_state.filters['country'] = st.selectbox(
             "Select Country:",
-            options=[""] + list(COUNTRIES.keys()),
-            format_func=lambda x: COUNTRIES.get(x, x),  # Display readable country names
+            options=("",) + COUNTRY_CATALOG.ids,
+            format_func=COUNTRY_CATALOG.label,  # Display readable country names
             key="country_select"
         )
 
         st.session_state.filters['category'] = st.selectbox(
             "Select Category:",
-            options=[""] + list(CATEGORIES.keys()),
-            format_func=lambda x: CATEGORIES.get(x, x),  # Display readable category names
+            options=("",) + CATEGORY_CATALOG.ids,
+            format_func=CATEGORY_CATALOG.label,  # Display readable category names
             key="category_select"
         )
 
         st.session_state.filters['author'] = st.selectbox(
             "Select Author:",
-            options=[""] + list(AUTHORS.keys()),
+            options=("",) + AUTHOR_CATALOG.ids,
             key="author_select"
         )
 
-        # Use predefined sources from news_sources.py
-        source_options = [source['id'] for source in NEWS_SOURCES]
-        source_names = [source['name'] for source in NEWS_SOURCES]
+        # Type-ahead over the source catalog; sources already selected always stay in the options
+        source_filter = st.text_input("Find sources:", key="source_filter_input")
+        source_options = SOURCES.search(source_filter) if source_filter else list(SOURCES.ids)
+        source_options += [source for source in st.session_state.get("source_select", []) if source not in source_options]
 
-        st.session_state.filters['sources'] = st.multiselect("Select Sources:", options=source_options, format_func=lambda x: source_names[source_options.index(x)], key="source_select")
+        st.session_state.filters['sources'] = st.multiselect("Select Sources:", options=source_options, format_func=SOURCES.label, key="source_select")
+        st.session_state.filters['per_source'] = st.checkbox("Query each source separately", value=st.session_state.filters.get('per_source', False), key="per_source_checkbox")
 
         # Number of articles to fetch
-        st.session_state.filters['num_articles'] = st.number_input("Number of articles to fetch:", min_value=1, max_value=100, value=st.session_state.filters['num_articles'], key="num_articles_input")
+        st.session_state.filters['num_articles'] = st.number_input("Number of articles to fetch:", min_value=1, max_value=1000, value=st.session_state.filters['num_articles'], key="num_articles_input")
+        st.session_state.filters['stream_results'] = st.checkbox("Stream results as they arrive (up to 100 articles)", value=st.session_state.filters.get('stream_results', False), key="stream_results_checkbox")
+        st.session_state.filters['local_first'] = st.checkbox("Local-first search (answer from stored articles, fetch only missing dates)", value=st.session_state.filters.get('local_first', False), key="local_first_checkbox")
+        st.session_state.filters['near_duplicates'] = st.checkbox("Remove near-duplicate articles (also applies to exports)", value=st.session_state.filters.get('near_duplicates', True), key="near_duplicates_checkbox")
 
         # Output format selection
-        output_options = [
-            "Title and Description",
-            "Title Only",
-            "Description Only",
-            "Content Only",
-            "Title, Description and Content"
-        ]
-        st.session_state.filters['output_format'] = st.selectbox("Select Output Format:", output_options, key="output_format_select")
+        st.session_state.filters['output_format'] = st.selectbox("Select Output Format:", OUTPUT_FORMATS, key="output_format_select")
 
         # Move Show Published Date checkbox to the bottom of the Filters tab
         show_date = st.checkbox("Show Published Date", value=st.session_state.show_date, key="show_date_checkbox")
         st.session_state.show_date = show_date
 
+        # Language, sources and output format are restored at the user's next login
+        if st.button("Save Preferences", key="save_preferences_button"):
+            save_user_preferences(st.session_state.filters, st.session_state['username'])
+            st.success("Preferences saved successfully!")
+
     # About Tab
     with tabs[2]:
         st.write("""
@@ -336,6 +522,7 @@ else:
             if st.button("Update API Key", key="update_api_key_button"):
                 if new_api_key:
                     save_api_key(new_api_key)
+                    reload_keys()
                     st.success("API Key updated successfully!")
                     api_key = new_api_key  # Update the local variable
                 else:
@@ -343,18 +530,30 @@ else:
 
             if st.button("Remove API Key", key="remove_api_key_button"):
                 save_api_key(None)  # Remove the API key
+                reload_keys()
                 api_key = None  # Clear the local variable
                 st.success("API Key removed successfully!")
+
+            # Extra keys spread requests over several NewsAPI quotas
+            pool_api_key = st.text_input("Add API Key to Pool:", placeholder="Enter another API key here", key="add_pool_key_input")
+
+            if st.button("Add to Key Pool", key="add_pool_key_button"):
+                if pool_api_key:
+                    add_api_key(pool_api_key)
+                    reload_keys()
+                    st.success("API Key added to the pool!")
+                else:
+                    st.warning("Please enter a valid API key.")
+
+            st.write(f"API keys in pool: **{len(load_api_keys())}**")
         else:
             st.write("No API Key found.")
             new_api_key = st.text_input("Enter your News API key:", key="new_api_key_input_2")
             if st.button("Save API Key", key="save_api_key_button_2"):
                 if new_api_key:
                     save_api_key(new_api_key)
+                    reload_keys()
                     st.success("API Key saved successfully!")
                     api_key = new_api_key  # Update the local variable
                 else:
                     st.warning("Please enter a valid API key.")
-
-# Close the database connection
-conn.close()
@@ -1,9 +1,7 @@
-import sqlite3
+import db
+from user_management import USERS_DATABASE_PATH
 
 def get_user_details(username):
-    conn = sqlite3.connect('users.db')
-    cursor = conn.cursor()
-    cursor.execute('SELECT * FROM users WHERE username=?', (username,))
-    user = cursor.fetchone()
-    conn.close()
+    with db.connection(USERS_DATABASE_PATH) as conn:
+        user = conn.execute('SELECT * FROM users WHERE username=?', (username,)).fetchone()
     return user
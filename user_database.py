@@ -1,85 +1,136 @@
-import sqlite3
-import secrets
+import atexit
+import threading
+import time
 from datetime import datetime, timedelta
 
-DATABASE_PATH = "news_app.db"  # Path to your SQLite database file
-
-def create_table():
-    """Creates the users and sessions tables if they don't exist."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS users (
-            username TEXT PRIMARY KEY,
-            password TEXT NOT NULL
-        )
-    """)
-    cursor.execute("""
-        CREATE TABLE IF NOT EXISTS sessions (
-            session_id TEXT PRIMARY KEY,
-            username TEXT NOT NULL,
-            last_activity DATETIME
-        )
-    """)
-    conn.commit()
-    conn.close()
+import db
+from migrations import APP_DATABASE_PATH as DATABASE_PATH
+
+# Sessions idle for longer than this are expired and swept
+SESSION_TIMEOUT = timedelta(days=30)
+# Seconds between flushes of buffered last_activity updates
+FLUSH_INTERVAL = 30
+# Seconds between sweeps of expired sessions
+SWEEP_INTERVAL = 3600
+
+# session_id -> newest last_activity not yet written; one UPDATE per session per flush
+_pending_activity = {}
+_pending_lock = threading.Lock()
+_worker = None
+_worker_lock = threading.Lock()
+
+def _timestamp(value):
+    # Stored as ISO text so timestamps compare (and use the index) as plain strings
+    return value.isoformat(sep=" ")
+
+def _parse_timestamp(value):
+    if value is None or isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(value)
 
 def add_user(username, password):
     """Adds a new user to the database."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
-    conn.commit()
-    conn.close()
+    with db.connection(DATABASE_PATH) as conn:
+        conn.execute("INSERT INTO users (username, password) VALUES (?, ?)", (username, password))
 
 def get_user(username):
     """Retrieves a user from the database."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT * FROM users WHERE username = ?", (username,))
-    user = cursor.fetchone()
-    conn.close()
-    return user
+    with db.connection(DATABASE_PATH) as conn:
+        return conn.execute("SELECT * FROM users WHERE username = ?", (username,)).fetchone()
 
 def save_session_id(session_id, username):
     """Saves the session ID and last activity timestamp for a user."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("INSERT OR REPLACE INTO sessions (session_id, username, last_activity) VALUES (?, ?, ?)",
-                   (session_id, username, datetime.now()))
-    conn.commit()
-    conn.close()
+    with _pending_lock:
+        _pending_activity.pop(session_id, None)
+    with db.connection(DATABASE_PATH) as conn:
+        conn.execute("INSERT OR REPLACE INTO sessions (session_id, username, last_activity) VALUES (?, ?, ?)",
+                     (session_id, username, _timestamp(datetime.now())))
+
+def get_session(session_id):
+    """Returns (username, last_activity) for a session in one lookup, or None.
+
+    last_activity includes updates still waiting in the write-behind buffer.
+    """
+    with db.connection(DATABASE_PATH) as conn:
+        result = conn.execute("SELECT username, last_activity FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+    if result is None:
+        return None
+    with _pending_lock:
+        pending = _pending_activity.get(session_id)
+    return result[0], pending or _parse_timestamp(result[1])
+
+def touch_session(session_id):
+    """Records activity for a session; written to the database by the next flush."""
+    with _pending_lock:
+        _pending_activity[session_id] = datetime.now()
 
 def get_user_by_session_id(session_id):
     """Retrieves the user associated with a given session ID."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT username FROM sessions WHERE session_id = ?", (session_id,))
-    result = cursor.fetchone()
-    conn.close()
-    return result[0] if result else None
+    session = get_session(session_id)
+    return session[0] if session else None
 
 def get_last_activity(session_id):
     """Retrieves the last activity timestamp for a given session ID."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("SELECT last_activity FROM sessions WHERE session_id = ?", (session_id,))
-    result = cursor.fetchone()
-    conn.close()
-    return result[0] if result else None
+    session = get_session(session_id)
+    return session[1] if session else None
 
 def save_last_activity(session_id):
     """Updates the last activity timestamp for a given session ID."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("UPDATE sessions SET last_activity = ? WHERE session_id = ?", (datetime.now(), session_id))
-    conn.commit()
-    conn.close()
+    touch_session(session_id)
 
 def remove_session_id(session_id):
     """Removes the session ID from the database."""
-    conn = sqlite3.connect(DATABASE_PATH)
-    cursor = conn.cursor()
-    cursor.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
-    conn.commit()
-    conn.close()
+    with _pending_lock:
+        _pending_activity.pop(session_id, None)
+    with db.connection(DATABASE_PATH) as conn:
+        conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+
+def flush_last_activity():
+    """Writes every buffered last_activity update in one transaction; returns how many."""
+    with _pending_lock:
+        if not _pending_activity:
+            return 0
+        pending = list(_pending_activity.items())
+        _pending_activity.clear()
+    try:
+        with db.connection(DATABASE_PATH) as conn:
+            conn.executemany("UPDATE sessions SET last_activity = ? WHERE session_id = ?",
+                             [(_timestamp(last_activity), session_id) for session_id, last_activity in pending])
+    except Exception as e:
+        print(f"An error occurred while saving session activity: {e}")
+        # Put the updates back unless the session has been touched again meanwhile
+        with _pending_lock:
+            for session_id, last_activity in pending:
+                _pending_activity.setdefault(session_id, last_activity)
+        return 0
+    return len(pending)
+
+def sweep_expired_sessions(timeout=SESSION_TIMEOUT):
+    """Deletes every session idle for longer than timeout in one statement; returns how many."""
+    flush_last_activity()
+    with db.connection(DATABASE_PATH) as conn:
+        return conn.execute("DELETE FROM sessions WHERE last_activity < ?", (_timestamp(datetime.now() - timeout),)).rowcount
+
+def _run_session_worker():
+    next_sweep = time.monotonic()
+    while True:
+        flush_last_activity()
+        if time.monotonic() >= next_sweep:
+            try:
+                sweep_expired_sessions()
+            except Exception as e:
+                print(f"An error occurred while sweeping expired sessions: {e}")
+            next_sweep = time.monotonic() + SWEEP_INTERVAL
+        time.sleep(FLUSH_INTERVAL)
+
+def start_session_worker():
+    """Starts the background flush/sweep thread once per process; safe to call on every rerun."""
+    global _worker
+    with _worker_lock:
+        if _worker is not None and _worker.is_alive():
+            return
+        _worker = threading.Thread(target=_run_session_worker, name="session-worker", daemon=True)
+        _worker.start()
+
+# Buffered updates would otherwise be lost when the process exits
+atexit.register(flush_last_activity)